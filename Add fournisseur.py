@@ -7,6 +7,11 @@ import pandas as pd
 from playwright.async_api import async_playwright, Page
 from typing import List, Dict
 
+from admin_listing import DEFAULT_CONCURRENCY as LISTING_CONCURRENCY, crawl_listing
+from catalog_index import CatalogIndex, product_id_from_url
+from context_factory import async_new_context
+from session_store import SessionStore, async_session_is_valid
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -15,18 +20,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+BASE_URL = "https://www.restoconcept.com"
+DEFAULT_CONCURRENCY = 4
+# Catalog index entries read longer ago than this are not trusted and the listing is crawled instead.
+CATALOG_MAX_AGE = 24 * 3600
+
 class RestoconceptAdmin:
-    def __init__(self, username: str, password: str, excel_file: str):
+    def __init__(self, username: str, password: str, excel_file: str, concurrency: int = DEFAULT_CONCURRENCY):
         """
         Initialize admin tool with credentials and Excel file path.
         
         :param username: Admin username
         :param password: Admin password
         :param excel_file: Path to Excel file with marque and fournisseur data
+        :param concurrency: Number of pages updating products at the same time
         """
         self.username = username
         self.password = password
         self.excel_file = excel_file
+        self.concurrency = max(1, concurrency)
+        self.counts = {"updated": 0, "unchanged": 0, "occasion": 0, "failed": 0}
+        self.base_url = BASE_URL
+        self.session_store = SessionStore()
+        self.resource_profile = None
+        self.listing_concurrency = LISTING_CONCURRENCY
+        self.catalog = None
+        # idf1 option labels and values -> option value, read from the first edit page
+        self.supplier_values = {}
         self.process_data = self._load_excel_data()
 
     def _load_excel_data(self) -> List[Dict[str, str]]:
@@ -49,6 +69,18 @@ class RestoconceptAdmin:
             logger.error(f"Error reading Excel file: {e}")
             return []
 
+    async def ensure_login(self, page: Page) -> None:
+        """
+        Reuse the saved session when it is still valid, otherwise log in.
+        
+        :param page: Playwright Page object
+        :raises Exception: If login fails
+        """
+        if await async_session_is_valid(page.context, self.base_url):
+            logger.info("Reusing saved session")
+            return
+        await self.login(page)
+
     async def login(self, page: Page) -> None:
         """
         Log in to the Restoconcept admin panel with robust error handling.
@@ -58,7 +90,7 @@ class RestoconceptAdmin:
         """
         try:
             # Navigate to login page
-            await page.goto("https://www.restoconcept.com/admin/logon.asp", wait_until="networkidle")
+            await page.goto(f"{self.base_url}/admin/logon.asp", wait_until="networkidle")
             await page.fill("#adminuser", self.username)
             await page.fill("#adminPass", self.password)
             
@@ -74,12 +106,14 @@ class RestoconceptAdmin:
             for selector in success_selectors:
                 if await page.is_visible(selector):
                     logger.info("Login successful")
+                    self.session_store.save(self.username, self.base_url, await page.context.storage_state())
                     return
             
             raise Exception("Login verification failed")
         
         except Exception as e:
             logger.error(f"Login failed: {str(e)}")
+            self.session_store.clear(self.username, self.base_url)
             raise
 
     async def process_marque(self, page: Page, marque: str) -> List[str]:
@@ -90,7 +124,7 @@ class RestoconceptAdmin:
         :param marque: Supplier/Brand to process
         :return: List of product edit URLs
         """
-        await page.goto("https://www.restoconcept.com/admin/SA_prod.asp", wait_until="networkidle")
+        await page.goto(f"{self.base_url}/admin/SA_prod.asp", wait_until="networkidle")
         
         # Wait and select supplier
         await page.wait_for_selector('select[name="marque"]')
@@ -100,29 +134,42 @@ class RestoconceptAdmin:
         # Wait for results
         await page.wait_for_load_state("networkidle")
 
-        all_edit_links = []
-        base_url = "https://www.restoconcept.com/admin/"
+        # The other result pages are fetched concurrently from the pagination links
+        all_edit_links = await crawl_listing(
+            page.context.request, page.url, await page.content(), self.listing_concurrency
+        )
 
-        while True:
-            # Extract edit links
-            links = await page.locator('a:has-text("Editer")').all()
-            current_page_links = [base_url + await link.get_attribute('href') for link in links]
-            all_edit_links.extend(current_page_links)
+        logger.info(f"Total product links found for {marque}: {len(all_edit_links)}")
+        return all_edit_links
 
-            # Check for next page
-            next_links = await page.locator('a:has-text("Suiv.")').all()
-            if not next_links:
-                break
+    async def load_supplier_values(self, page: Page) -> None:
+        """
+        Map the idf1 options of an edit page so the sheet may name a supplier by label or by value.
+        
+        :param page: Playwright Page object on a product edit page
+        """
+        options = await page.locator('select[name="idf1"] option').evaluate_all(
+            "options => options.map(o => [o.value, o.textContent.trim()])"
+        )
+        values = {label: value for value, label in options if label}
+        # A value wins over a label that happens to look like another option's value
+        values.update({value: value for value, _ in options})
+        self.supplier_values = values
 
-            try:
-                await next_links[0].click()
-                await page.wait_for_load_state("networkidle")
-            except Exception as e:
-                logger.error(f"Error navigating to next page: {e}")
-                break
+    async def ensure_supplier_values(self, page: Page, url: str) -> None:
+        """
+        Load the supplier options from the edit page at `url` unless they are known already.
+        """
+        if not self.supplier_values:
+            await page.goto(url, wait_until="domcontentloaded")
+            await page.wait_for_selector('select[name="idf1"]')
+            await self.load_supplier_values(page)
 
-        logger.info(f"Total product links found for {marque}: {len(all_edit_links)}")
-        return all_edit_links
+    def supplier_value(self, fournisseur: str) -> str:
+        """
+        Return the idf1 option value for a supplier given by label or value in the sheet.
+        """
+        return self.supplier_values.get(fournisseur.strip(), fournisseur)
 
     async def process_produit(self, page: Page, url: str, fournisseur: str) -> None:
         """
@@ -130,7 +177,7 @@ class RestoconceptAdmin:
         
         :param page: Playwright Page object
         :param url: Product edit page URL
-        :param fournisseur: Supplier ID to set
+        :param fournisseur: Supplier ID or name to set
         """
         try:
             await page.goto(url, wait_until="networkidle")
@@ -139,11 +186,22 @@ class RestoconceptAdmin:
             selected_option = await page.locator('select[name="photoplus"] option:checked').get_attribute("value")
             if selected_option == "occasion.jpg":
                 logger.info(f"Skipping 'Occasion' product: {url}")
+                self.counts["occasion"] += 1
                 return
 
-            # Select fournisseur (supplier)
+            # Skip the write when the product already has this supplier
             await page.wait_for_selector('select[name="idf1"]')
-            await page.select_option('select[name="idf1"]', fournisseur)
+            if not self.supplier_values:
+                await self.load_supplier_values(page)
+            supplier = self.supplier_value(fournisseur)
+            current_fournisseur = await page.locator('select[name="idf1"]').input_value()
+            if current_fournisseur == supplier:
+                logger.info(f"Fournisseur already set, skipping product: {url}")
+                self.counts["unchanged"] += 1
+                return
+
+            # Select fournisseur (supplier)
+            await page.select_option('select[name="idf1"]', value=supplier)
 
             # Update product details
             update_buttons = page.locator(
@@ -155,14 +213,87 @@ class RestoconceptAdmin:
                 await update_buttons.click()
                 await page.wait_for_load_state("networkidle")
                 logger.info(f"Successfully processed product: {url}")
+                self.counts["updated"] += 1
+                if self.catalog is not None:
+                    self.catalog.update(product_id_from_url(url), supplier=supplier)
             else:
                 logger.warning(f"No update button found for product: {url}")
+                self.counts["failed"] += 1
 
         except Exception as e:
             logger.error(f"Error processing product {url}: {str(e)}")
+            self.counts["failed"] += 1
             with open("failed_products.txt", "a") as failed_file:
                 failed_file.write(f"{url}\n")
 
+    async def produce_links(self, page: Page, queue: asyncio.Queue) -> None:
+        """
+        Crawl every marque and queue its product links with the fournisseur to set.
+        
+        :param page: Playwright Page object used for the listings
+        :param queue: Queue of (url, fournisseur) pairs, closed with one None per worker
+        """
+        try:
+            for entry in self.process_data:
+                try:
+                    marque = str(entry['marque'])
+                    fournisseur = str(entry['fournisseur'])
+                    
+                    logger.info(f"Processing Marque: {marque}, Fournisseur: {fournisseur}")
+                    
+                    if self.catalog is not None and self.catalog.brand_is_fresh(marque, CATALOG_MAX_AGE):
+                        # The index stores option values: resolve a supplier name first
+                        await self.ensure_supplier_values(
+                            page, self.catalog.edit_urls(self.base_url, self.catalog.query(brand=marque)[:1])[0]
+                        )
+                        # Only the products the index says still need this supplier
+                        products = self.catalog.query(
+                            brand=marque, without_supplier=self.supplier_value(fournisseur),
+                            without_photoplus="occasion.jpg",
+                            max_age=CATALOG_MAX_AGE
+                        )
+                        links = self.catalog.edit_urls(self.base_url, products)
+                        logger.info(f"{len(links)} product links for {marque} resolved from the catalog index")
+                    else:
+                        links = await self.process_marque(page, marque)
+
+                    for link in links:
+                        await queue.put((link, fournisseur))
+
+                except Exception as marque_error:
+                    logger.error(f"Error processing marque {marque}: {marque_error}")
+        finally:
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+    async def product_worker(self, context, queue: asyncio.Queue) -> None:
+        """
+        Update queued products on a page of its own until the queue is closed.
+        An error on one product, or a crashed page, does not stop the worker.
+        
+        :param context: Browser context sharing the admin session
+        :param queue: Queue filled by produce_links
+        """
+        page = await context.new_page()
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                link, fournisseur = item
+                try:
+                    if page.is_closed():
+                        page = await context.new_page()
+                    await self.process_produit(page, link, fournisseur)
+                except Exception as product_error:
+                    logger.error(f"Skipping product due to error: {link} ({product_error})")
+                    self.counts["failed"] += 1
+                    with open("failed_products.txt", "a") as failed_file:
+                        failed_file.write(f"{link}\n")
+        finally:
+            if not page.is_closed():
+                await page.close()
+
 
     async def run(self):
         """
@@ -178,30 +309,28 @@ class RestoconceptAdmin:
                     headless=True,
                     args=['--no-sandbox', '--disable-setuid-sandbox']
                 )
-                context = await browser.new_context()
+                context, blocking_stats = await async_new_context(
+                    browser, self.resource_profile, base_url=self.base_url,
+                    storage_state=self.session_store.load(self.username, self.base_url)
+                )
                 page = await context.new_page()
 
                 # Execute main workflow
-                await self.login(page)
+                await self.ensure_login(page)
                 
-                # Process each marque and fournisseur combination
-                for entry in self.process_data:
-                    try:
-                        marque = str(entry['marque'])
-                        fournisseur = str(entry['fournisseur'])
-                        
-                        logger.info(f"Processing Marque: {marque}, Fournisseur: {fournisseur}")
-                        
-                        edit_links = await self.process_marque(page, marque)
-                        
-                        for link in edit_links:
-                            try:
-                                await self.process_produit(page, link, fournisseur)
-                            except Exception as product_error:
-                                logger.error(f"Skipping product due to error: {link}")
-
-                    except Exception as marque_error:
-                        logger.error(f"Error processing marque {marque}: {marque_error}")
+                # Listings are crawled on the login page while a pool of pages
+                # updates the products already found.
+                queue = asyncio.Queue(maxsize=self.concurrency * 4)
+                await asyncio.gather(
+                    self.produce_links(page, queue),
+                    *(self.product_worker(context, queue) for _ in range(self.concurrency))
+                )
+
+                logger.info(
+                    f"Products: {self.counts['updated']} updated, {self.counts['unchanged']} already up to date, "
+                    f"{self.counts['occasion']} occasion skipped, {self.counts['failed']} failed"
+                )
+                logger.info(blocking_stats.summary())
 
             except Exception as e:
                 logger.critical(f"Critical script error: {str(e)}")
@@ -238,6 +367,7 @@ def main():
     
     # Create and run admin tool
     admin_tool = RestoconceptAdmin(USERNAME, PASSWORD, excel_file)
+    admin_tool.catalog = CatalogIndex()
     asyncio.run(admin_tool.run())
 
 if __name__ == "__main__":
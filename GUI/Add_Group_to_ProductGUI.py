@@ -1,44 +1,137 @@
 
 
 
+import os
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QTextEdit, QFrame, QCheckBox, QProgressBar
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QTextEdit, QFrame, QCheckBox, QProgressBar, QFileDialog
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
+import pandas as pd
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog_index import CatalogIndex
+from context_factory import new_context
+from job_journal import JobJournal, STATUS_DONE, STATUS_FAILED, input_hash
+from session_store import SessionStore, session_is_valid
+
+BASE_URL = "https://www.restoconcept.com"
+MATRIX_PRODUCT_COLUMN = "Product ID"
+MATRIX_GROUPS_COLUMN = "Groups"
+MATRIX_GROUP_SEPARATOR = ";"
+# Text of the rows listing the attached groups, in the table holding the group dropdown
+ATTACHED_GROUPS_JS = """
+() => {
+    const select = document.querySelector('select#idOptionGroup');
+    const table = select && select.closest('table');
+    if (!table) return [];
+    return Array.from(table.rows)
+        .filter(row => !row.contains(select))
+        .flatMap(row => Array.from(row.cells))
+        .filter(cell => !cell.querySelector('select, form, table'))
+        .map(cell => cell.textContent.trim().split(/\\s+/).join(' '))
+        .filter(text => text);
+}
+"""
+ADD_GROUP_BUTTON = "button[type='submit'][style='font-family:arial; font-size:14px; cursor:pointer; background-color:#005c99; color:#fff; border:0; border-radius:3px; padding:3px 14px;']:has-text('Ajouter')"
+
+
+def normalize_label(text):
+    return " ".join(text.split())
+
+
+def load_assignments(path):
+    """
+    Read a (product, groups) spreadsheet into {product_id: [group names]}.
+    The Groups cell may hold several names separated by ';', and a product may
+    appear on several rows: its groups are merged in order.
+    """
+    frame = pd.read_csv(path, dtype=str) if path.lower().endswith(".csv") else pd.read_excel(path, dtype=str)
+    missing = [name for name in (MATRIX_PRODUCT_COLUMN, MATRIX_GROUPS_COLUMN) if name not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    assignments = {}
+    for product_id, groups in frame[[MATRIX_PRODUCT_COLUMN, MATRIX_GROUPS_COLUMN]].dropna().itertuples(index=False):
+        names = assignments.setdefault(product_id.strip(), [])
+        for name in groups.split(MATRIX_GROUP_SEPARATOR):
+            if name.strip() and name.strip() not in names:
+                names.append(name.strip())
+    return {product_id: names for product_id, names in assignments.items() if product_id and names}
+
 
 class AutomationWorker(QThread):
     log_update = pyqtSignal(str)
     progress_update = pyqtSignal(int)
     finished = pyqtSignal()
 
-    def __init__(self, username, password, product_ids, group_name, headless):
+    def __init__(self, username, password, product_ids, group_name, headless, resource_profile=None, assignments=None):
         super().__init__()
         self.username = username
         self.password = password
         self.product_ids = product_ids  # List of product IDs
         self.group_name = group_name
+        # Matrix mode: {product_id: [group names]}, replaces product_ids and group_name
+        self.assignments = assignments
         self.headless = headless
+        self.resource_profile = resource_profile
+        self.base_url = BASE_URL
+        self.session_store = SessionStore()
+        # Label -> value map of select#idOptionGroup, read once per session
+        self.group_options = None
 
     def run(self):
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=self.headless)
-            page = browser.new_page()
-
+            context, blocking_stats = new_context(
+                browser, self.resource_profile, base_url=self.base_url,
+                storage_state=self.session_store.load(self.username, self.base_url)
+            )
+            page = context.new_page()
+
+            if self.assignments:
+                journal = JobJournal("group-matrix")
+                plan = list(self.assignments.items())
+            else:
+                journal = JobJournal(f"group-assign:{self.group_name}")
+                plan = [(product_id, [self.group_name]) for product_id in self.product_ids]
             try:
-                self.login(page)
-                for product_id in self.product_ids:  # Iterate over each product ID
-                    self.add_product_to_group(page, product_id)
+                self.ensure_login(page)
+                for product_id, group_names in plan:  # Iterate over each product ID
+                    row_hash = input_hash(*sorted(group_names))
+                    if journal.is_done(product_id, row_hash):
+                        self.log_update.emit(f"Product {product_id} already added to {', '.join(group_names)} in a previous run. Skipping.")
+                        continue
+                    try:
+                        if self.assignments:
+                            added = self.add_groups_to_product(page, product_id, group_names)
+                        else:
+                            added = self.add_product_to_group(page, product_id)
+                    except Exception as e:
+                        self.log_update.emit(f"Error on product {product_id}: {str(e)}")
+                        journal.record(product_id, row_hash, STATUS_FAILED, str(e))
+                        continue
+                    journal.record(product_id, row_hash, STATUS_DONE if added else STATUS_FAILED)
             except Exception as e:
                 self.log_update.emit(f"An error occurred: {str(e)}")
             finally:
+                summary = journal.summary()
+                journal.close()
+                self.log_update.emit(f"Journal: {summary.get(STATUS_DONE, 0)} done, {summary.get(STATUS_FAILED, 0)} failed.")
+                self.log_update.emit(blocking_stats.summary())
                 browser.close()
                 self.finished.emit()
 
+    def ensure_login(self, page):
+        if session_is_valid(page.context, self.base_url):
+            self.log_update.emit("Reusing saved session.")
+            self.progress_update.emit(40)
+        else:
+            self.login(page)
+
     def login(self, page):
         self.log_update.emit("Attempting to log in...")
         self.progress_update.emit(10)
-        page.goto("https://www.restoconcept.com/admin/logon.asp")
+        page.goto(f"{self.base_url}/admin/logon.asp")
         page.fill("#adminuser", self.username)
         page.fill("#adminPass", self.password)
         page.click("#btn1")
@@ -49,41 +142,102 @@ class AutomationWorker(QThread):
             )
             self.log_update.emit("Login successful.")
             self.progress_update.emit(40)
+            self.session_store.save(self.username, self.base_url, page.context.storage_state())
         except PlaywrightTimeoutError:
+            self.session_store.clear(self.username, self.base_url)
             raise Exception("Login failed. Please check your username and password.")
 
     def add_product_to_group(self, page, product_id):
         self.log_update.emit(f"Navigating to product page for ID: {product_id}")
         self.progress_update.emit(60)
-        page.goto(f"https://www.restoconcept.com/admin/SA_prod_edit.asp?action=edit&recid={product_id}")
+        page.goto(f"{self.base_url}/admin/SA_prod_edit.asp?action=edit&recid={product_id}")
 
         self.log_update.emit(f"Checking for group: {self.group_name}")
         self.progress_update.emit(70)
 
-        # Check if the option exists
-        option_exists = page.evaluate(f"""
-        () => {{
-            const select = document.querySelector('select#idOptionGroup');
-            if (!select) return false;
-            return Array.from(select.options).some(option => option.text.includes('{self.group_name}'));
-        }}
-        """)
-
-        if not option_exists:
+        value = self.group_value(page, self.group_name)
+        if value is None:
             self.log_update.emit(f"Error: Group '{self.group_name}' not found in the dropdown for product ID {product_id}.")
             self.progress_update.emit(100)
-            return
+            return False
 
         self.log_update.emit(f"Selecting group: {self.group_name} for product ID {product_id}")
         self.progress_update.emit(80)
-        page.select_option("select#idOptionGroup", label=self.group_name)
-
         self.log_update.emit(f"Clicking 'Add' button for product ID {product_id}")
-        page.click("button[type='submit'][style='font-family:arial; font-size:14px; cursor:pointer; background-color:#005c99; color:#fff; border:0; border-radius:3px; padding:3px 14px;']:has-text('Ajouter')")
+        self.submit_group(page, value)
 
 
         self.log_update.emit(f"Added product {product_id} to group {self.group_name}")
         self.progress_update.emit(100)
+        return True
+
+
+    def add_groups_to_product(self, page, product_id, group_names):
+        """
+        Matrix mode: add every missing group to a product in a single visit of its page.
+        Groups the page already lists as attached are skipped. Each add reloads the
+        page; submit_group() returns once the new page is loaded.
+        """
+        self.log_update.emit(f"Navigating to product page for ID: {product_id}")
+        page.goto(f"{self.base_url}/admin/SA_prod_edit.asp?action=edit&recid={product_id}")
+
+        attached = self.attached_groups(page)
+        complete = True
+        for group_name in group_names:
+            # After an add, the next group is only selected on the reloaded page's dropdown
+            page.wait_for_selector("select#idOptionGroup")
+            label = self.group_label(page, group_name)
+            if label is None:
+                self.log_update.emit(f"Error: Group '{group_name}' not found in the dropdown for product ID {product_id}.")
+                complete = False
+                continue
+            if label in attached:
+                self.log_update.emit(f"Product {product_id} is already in group {group_name}. Skipping.")
+                continue
+            self.submit_group(page, self.group_options[label])
+            self.log_update.emit(f"Added product {product_id} to group {group_name}")
+        return complete
+
+    def attached_groups(self, page):
+        """
+        Return the labels of the groups listed as attached, read from the
+        table that holds select#idOptionGroup only.
+        """
+        return set(page.evaluate(ATTACHED_GROUPS_JS))
+
+    def submit_group(self, page, value):
+        page.select_option("select#idOptionGroup", value=value)
+        # The edit page answers the POST with a redirect back to itself (302): return once
+        # the reloaded page has replaced the old one, not as soon as the POST answers
+        with page.expect_navigation(wait_until="domcontentloaded", timeout=15000):
+            with page.expect_response(lambda response: response.request.method == "POST", timeout=15000) as response_info:
+                page.click(ADD_GROUP_BUTTON)
+        if response_info.value.status >= 400:
+            raise Exception(f"Adding the group returned HTTP {response_info.value.status}")
+
+    def group_label(self, page, group_name):
+        """
+        Return the dropdown label of a group, or None when it is not in the dropdown.
+        Only an exact label matches, whitespace aside: a partial match could pick
+        another group ("Four" in "Fourneaux"). The dropdown is the same on every
+        product page, so it is only read once.
+        """
+        if self.group_options is None:
+            page.wait_for_selector("select#idOptionGroup")
+            pairs = page.eval_on_selector_all(
+                "select#idOptionGroup option", "options => options.map(option => [option.text.trim(), option.value])"
+            )
+            self.group_options = {normalize_label(label): value for label, value in pairs}
+            self.log_update.emit(f"Cached {len(self.group_options)} groups from the dropdown.")
+        label = normalize_label(group_name)
+        return label if label in self.group_options else None
+
+    def group_value(self, page, group_name):
+        """
+        Return the idOptionGroup value of a group, or None when it is not in the dropdown.
+        """
+        label = self.group_label(page, group_name)
+        return None if label is None else self.group_options[label]
 
 
 class MainWindow(QMainWindow):
@@ -120,10 +274,18 @@ class MainWindow(QMainWindow):
 
         # Products ID input
         self.products_id_input = QLineEdit()
-        self.products_id_input.setPlaceholderText("Enter product IDs separated by commas")
+        self.products_id_input.setPlaceholderText("Enter product IDs separated by commas, or marque:<brand> from the catalog index")
         input_layout.addWidget(QLabel("Product IDs "))
         input_layout.addWidget(self.products_id_input)
 
+        # Matrix mode: a spreadsheet of products and their groups
+        self.matrix_file = None
+        self.matrix_button = QPushButton("Load product/groups spreadsheet (matrix mode)")
+        self.matrix_button.clicked.connect(self.select_matrix_file)
+        input_layout.addWidget(self.matrix_button)
+        self.matrix_label = QLabel("No spreadsheet: the group and product IDs above are used")
+        input_layout.addWidget(self.matrix_label)
+
         # Headless mode checkbox
         self.headless_checkbox = QCheckBox("Run in headless mode")
         self.headless_checkbox.setChecked(True)
@@ -154,7 +316,28 @@ class MainWindow(QMainWindow):
 
     def get_product_ids(self):
         # Split the input by commas and strip whitespace from each ID
-        return [id.strip() for id in self.products_id_input.text().split(",") if id.strip()]
+        tokens = [id.strip() for id in self.products_id_input.text().split(",") if id.strip()]
+        product_ids = []
+        catalog = None
+        for token in tokens:
+            if token.lower().startswith("marque:"):
+                # Resolve every product of the brand from the local catalog index
+                catalog = catalog or CatalogIndex()
+                product_ids.extend(str(product.id) for product in catalog.query(brand=token[len("marque:"):].strip()))
+            else:
+                product_ids.append(token)
+        if catalog is not None:
+            catalog.close()
+        return list(dict.fromkeys(product_ids))
+
+    def select_matrix_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Select product/groups spreadsheet", "", "Spreadsheets (*.xlsx *.xlsm *.xls *.csv)"
+        )
+        if file_path:
+            self.matrix_file = file_path
+            self.matrix_label.setText(f"Matrix mode: {os.path.basename(file_path)} "
+                                      f"({MATRIX_PRODUCT_COLUMN}, {MATRIX_GROUPS_COLUMN} separated by '{MATRIX_GROUP_SEPARATOR}')")
 
     def start_automation(self):
         # Collect the necessary parameters for the automation
@@ -163,9 +346,19 @@ class MainWindow(QMainWindow):
         product_ids = self.get_product_ids()
         group_name = self.group_name_input.text()
         headless = self.headless_checkbox.isChecked()
+        assignments = None
+        if self.matrix_file:
+            try:
+                assignments = load_assignments(self.matrix_file)
+            except Exception as e:
+                self.log_message(f"Could not read {self.matrix_file}: {str(e)}")
+                return
+            self.log_message(f"Matrix mode: {len(assignments)} products, "
+                             f"{sum(len(names) for names in assignments.values())} group assignments.")
 
         # Create the AutomationWorker thread with the collected parameters
-        self.automation_worker = AutomationWorker(username, password, product_ids, group_name, headless)
+        self.automation_worker = AutomationWorker(username, password, product_ids, group_name, headless,
+                                                  assignments=assignments)
 
         # Connect signals for logging, progress updates, and when the process finishes
         self.automation_worker.log_update.connect(self.log_message)
@@ -2,7 +2,6 @@
 
 
 import sys
-import pandas as pd
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, 
                              QLineEdit, QFileDialog, QProgressBar, QCheckBox, QFrame, QMessageBox, QTextEdit)
@@ -13,11 +12,27 @@ import sys
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QFrame, 
                              QLabel, QPushButton, QLineEdit, QCheckBox, QProgressBar, 
                              QTextEdit, QFileDialog, QMessageBox, QTabWidget, QScrollArea,
-                             QSizePolicy)
+                             QSizePolicy, QSpinBox, QComboBox)
 from PyQt5.QtGui import QIcon, QFont, QColor, QPalette
 from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, QSize
 
+import os
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from option_http_engine import (HttpOptionEngine, OPTION_FIELDS, RESULT_ADDED, RESULT_EXISTS,
+                                RESULT_EXPIRED, RESULT_UNEXPECTED)
+from context_factory import new_context
+from job_journal import JobJournal, STATUS_DONE, STATUS_FAILED, input_hash
+from options_ingest import OptionSource
+from session_store import SessionStore, session_is_valid
+
+BASE_URL = "https://www.restoconcept.com"
+MAX_WORKERS = 8
+ENGINE_PLAYWRIGHT = "playwright"
+ENGINE_HTTP = "http"
 
 
 class OptionsUploaderThread(QThread):
@@ -26,41 +41,69 @@ class OptionsUploaderThread(QThread):
     error_occurred = pyqtSignal(str)
     log_update = pyqtSignal(str)
 
-    def __init__(self, excel_file, username, password, headless):
+    def __init__(self, excel_file, username, password, headless, workers=1, engine=ENGINE_PLAYWRIGHT,
+                 resource_profile=None):
         super().__init__()
         self.excel_file = excel_file
         self.username = username
         self.password = password
         self.headless = headless
+        self.workers = max(1, min(int(workers), MAX_WORKERS))
+        self.engine = engine
+        self.resource_profile = resource_profile
+        self.blocking_stats = None
+        self.base_url = BASE_URL
+        self.session_store = SessionStore()
+        self._progress_lock = threading.Lock()
+        self._rows_done = 0
+        self._total_rows = 0
+        self.journal = None
 
     def run(self):
-        options_df = pd.read_excel(self.excel_file)
-        total_rows = len(options_df)
+        self._rows_done = 0
+        try:
+            source = OptionSource(self.excel_file, on_reject=self.reject_row, on_skip=self.skip_blank_row)
+            total_rows = source.total
+            self.journal = JobJournal(f"options-upload:{os.path.abspath(self.excel_file)}")
+        except Exception as e:
+            self.error_occurred.emit(f"An error occurred: {str(e)}")
+            self.log_update.emit(f"Critical error: {str(e)}")
+            return
+        self._total_rows = total_rows
+        records = self.pending_records(source, total_rows)
+
+        try:
+            if self.engine == ENGINE_HTTP:
+                self.run_http(records, total_rows)
+            elif self.workers > 1:
+                self.run_sharded(records, total_rows)
+            else:
+                self.run_single(records, total_rows)
+        finally:
+            summary = self.journal.summary()
+            self.journal.close()
+        if self.blocking_stats is not None:
+            self.log_update.emit(self.blocking_stats.summary())
+        self.log_update.emit(
+            f"Journal: {summary.get(STATUS_DONE, 0)} rows done, {summary.get(STATUS_FAILED, 0)} failed "
+            "(failed rows are retried on the next run)."
+        )
+
+        self.status_update.emit("Upload process completed.")
+        self.log_update.emit("Upload process completed. Check the log for details.")
 
+    def run_single(self, records, total_rows):
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=self.headless)
-            context = browser.new_context()
+            context = self.new_context(browser, storage_state=self.session_store.load(self.username, self.base_url))
             page = context.new_page()
 
             try:
                 self.log_update.emit("Starting the upload process...")
-                self.login(page)
-
-                for index, row in options_df.iterrows():
-                    self.status_update.emit(f"Processing option {index + 1} of {total_rows}")
-                    self.log_update.emit(f"Processing option {index + 1} of {total_rows}")
-
-                    try:
-                        self.navigate_to_options_page(page)
-                        self.fill_option_form(page, row)
-                        self.submit_option(page)
-                        self.handle_submission_result(page)
-                    except Exception as e:
-                        self.log_update.emit(f"Error processing option {index + 1}: {str(e)}")
-                        continue
+                self.ensure_login(page)
 
-                    progress = int((index + 1) / total_rows * 100)
-                    self.progress_update.emit(progress)
+                for record in records:
+                    self.process_row(page, record, total_rows)
 
             except Exception as e:
                 self.error_occurred.emit(f"An error occurred: {str(e)}")
@@ -69,12 +112,193 @@ class OptionsUploaderThread(QThread):
                 # context.close()
                 # browser.close()
 
-        self.status_update.emit("Upload process completed.")
-        self.log_update.emit("Upload process completed. Check the log for details.")
+    def run_sharded(self, records, total_rows):
+        """
+        Split the rows across several browser contexts that share one login.
+
+        The first context logs in and its storage state (cookies) is handed to
+        every worker thread, each of which drives its own Playwright instance
+        and pulls records from the shared stream until it is exhausted.
+        """
+        self.log_update.emit(f"Starting the upload process with {self.workers} workers...")
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=self.headless)
+            context = self.new_context(browser, storage_state=self.session_store.load(self.username, self.base_url))
+            page = context.new_page()
+            try:
+                self.ensure_login(page)
+                storage_state = context.storage_state()
+            except Exception as e:
+                self.error_occurred.emit(f"An error occurred: {str(e)}")
+                self.log_update.emit(f"Critical error: {str(e)}")
+                return
+            finally:
+                context.close()
+                browser.close()
+
+        records = iter(records)
+        records_lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self.shard_worker, args=(worker_id, records, records_lock, storage_state, total_rows), daemon=True)
+            for worker_id in range(1, self.workers + 1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def shard_worker(self, worker_id, records, records_lock, storage_state, total_rows):
+        # Playwright's sync API is not thread-safe: every worker needs its own instance.
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=self.headless)
+            context = self.new_context(browser, storage_state=storage_state)
+            page = context.new_page()
+            try:
+                while True:
+                    with records_lock:
+                        record = next(records, None)
+                    if record is None:
+                        break
+                    self.process_row(page, record, total_rows, prefix=f"[worker {worker_id}] ")
+            except Exception as e:
+                self.log_update.emit(f"[worker {worker_id}] Critical error: {str(e)}")
+            finally:
+                context.close()
+                browser.close()
+
+    def run_http(self, records, total_rows):
+        """
+        Post the option forms over a pooled HTTP session, `workers` at a time.
+
+        Chromium is only used to log in and as a fallback: rows whose response
+        is not recognised are replayed through the Playwright form on `page`.
+        """
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=self.headless)
+            context = self.new_context(browser, storage_state=self.session_store.load(self.username, self.base_url))
+            page = context.new_page()
+
+            try:
+                self.log_update.emit(f"Starting the HTTP upload process with {self.workers} workers...")
+                self.ensure_login(page)
+                engine = HttpOptionEngine(self.base_url, context.storage_state(), pool_size=self.workers)
+            except Exception as e:
+                self.error_occurred.emit(f"An error occurred: {str(e)}")
+                self.log_update.emit(f"Critical error: {str(e)}")
+                return
+
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    # Keep a bounded number of posts in flight so the sheet is consumed as a stream.
+                    in_flight = {}
+                    for record in records:
+                        in_flight[pool.submit(engine.submit_option, self.option_fields(record))] = record
+                        if len(in_flight) >= self.workers * 4:
+                            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                self.finish_http_row(page, engine, future, in_flight.pop(future), total_rows)
+                    for future in as_completed(list(in_flight)):
+                        self.finish_http_row(page, engine, future, in_flight.pop(future), total_rows)
+            except Exception as e:
+                self.error_occurred.emit(f"An error occurred: {str(e)}")
+                self.log_update.emit(f"Critical error: {str(e)}")
+            finally:
+                engine.close()
+                context.close()
+                browser.close()
+
+    def finish_http_row(self, page, engine, future, record, total_rows):
+        self.status_update.emit(f"Processing option {record.index + 1} of {total_rows}")
+        try:
+            result = future.result()
+            if result == RESULT_EXPIRED:
+                self.log_update.emit("Session expired. Attempting to log in again...")
+                self.ensure_login(page)
+                engine.set_cookies(page.context.storage_state())
+                result = engine.submit_option(self.option_fields(record))
+        except Exception as e:
+            self.log_update.emit(f"HTTP error on option {record.index + 1}: {str(e)}")
+            result = RESULT_UNEXPECTED
+
+        if result in (RESULT_UNEXPECTED, RESULT_EXPIRED):
+            self.log_update.emit(f"Falling back to the browser for option {record.index + 1}.")
+            self.process_row(page, record, total_rows)
+            return
+
+        self.log_result(result)
+        self.journal_row(record, result)
+        self.row_finished(total_rows)
+
+    def pending_records(self, records, total_rows):
+        """
+        Skip the records already done with the same input in a previous run.
+        """
+        skipped = 0
+        for record in records:
+            if self.journal.is_done(self.row_key(record), self.row_hash(record)):
+                skipped += 1
+                self.row_finished(total_rows)
+                continue
+            yield record
+        if skipped:
+            self.log_update.emit(f"Skipped {skipped} options already uploaded in a previous run.")
+
+    def row_key(self, record):
+        return record.ref or record.optionDescrip
+
+    def row_hash(self, record):
+        return input_hash(*(getattr(record, name) for name in OPTION_FIELDS))
+
+    def journal_row(self, record, result, message=""):
+        status = STATUS_DONE if result in (RESULT_ADDED, RESULT_EXISTS) else STATUS_FAILED
+        self.journal.record(self.row_key(record), self.row_hash(record), status, message or result)
+
+    def process_row(self, page, record, total_rows, prefix=""):
+        self.status_update.emit(f"Processing option {record.index + 1} of {total_rows}")
+        self.log_update.emit(f"{prefix}Processing option {record.index + 1} of {total_rows}")
+
+        try:
+            self.navigate_to_options_page(page)
+            self.fill_option_form(page, record)
+            self.submit_option(page)
+            result = self.handle_submission_result(page)
+        except Exception as e:
+            self.log_update.emit(f"{prefix}Error processing option {record.index + 1}: {str(e)}")
+            self.journal_row(record, RESULT_UNEXPECTED, str(e))
+        else:
+            self.journal_row(record, result)
+        self.row_finished(total_rows)
+
+    def reject_row(self, index, reason):
+        self.log_update.emit(f"Skipping option {index + 1}: {reason}")
+        self.row_finished(self._total_rows)
+
+    def skip_blank_row(self, index):
+        # Blank rows are counted in the total: count them as done without logging each one
+        self.row_finished(self._total_rows)
+
+    def row_finished(self, total_rows):
+        with self._progress_lock:
+            self._rows_done += 1
+            progress = min(100, int(self._rows_done / max(total_rows, 1) * 100))
+        self.progress_update.emit(progress)
+
+    def new_context(self, browser, **context_args):
+        # One BlockingStats is shared by every context of the run, including the worker threads'.
+        context, self.blocking_stats = new_context(
+            browser, self.resource_profile, self.blocking_stats, self.base_url, **context_args
+        )
+        return context
+
+    def ensure_login(self, page):
+        if session_is_valid(page.context, self.base_url):
+            self.log_update.emit("Reusing saved session.")
+        else:
+            self.login(page)
 
     def login(self, page):
         self.log_update.emit("Attempting to log in...")
-        page.goto("https://www.restoconcept.com/admin/logon.asp")
+        page.goto(f"{self.base_url}/admin/logon.asp")
         page.fill("#adminuser", self.username)
         page.fill("#adminPass", self.password)
         page.click("#btn1")
@@ -82,28 +306,25 @@ class OptionsUploaderThread(QThread):
         try:
             page.wait_for_selector('td[align="center"][style="background-color:#eeeeee"]:has-text("© Copyright 2024 - Restoconcept")', timeout=5000)
             self.log_update.emit("Login successful.")
+            self.session_store.save(self.username, self.base_url, page.context.storage_state())
         except PlaywrightTimeoutError:
+            self.session_store.clear(self.username, self.base_url)
             raise Exception("Login failed. Please check your username and password.")
 
     def navigate_to_options_page(self, page):
-        page.goto("https://www.restoconcept.com/admin/options/optionslist.asp")
+        page.goto(f"{self.base_url}/admin/options/optionslist.asp")
         page.click('a[href="/admin/SA_opt_edit.asp?action=add"]')
 
-    def fill_option_form(self, page, row):
-
-        optionDescrip = str(row['optionDescrip']) if pd.notna(row['optionDescrip']) else ''
-        ref = str(row['ref']) if pd.notna(row['ref']) else ''
-        pricetoadd = str(row['pricetoadd']) if pd.notna(row['pricetoadd']) else ''
-        prixpublic = str(row['prixpublic']) if pd.notna(row['prixpublic']) else ''
-        iddelai = str(row['iddelai']) if pd.notna(row['iddelai']) else ''
+    def option_fields(self, record):
+        return {name: getattr(record, name) for name in OPTION_FIELDS}
 
-
-        page.fill("#optionDescrip", optionDescrip)
-        page.fill("#ref", ref)
-        page.fill("#pricetoadd", pricetoadd)
-        page.fill("#prixpublic", prixpublic)
+    def fill_option_form(self, page, record):
+        page.fill("#optionDescrip", record.optionDescrip)
+        page.fill("#ref", record.ref)
+        page.fill("#pricetoadd", record.pricetoadd)
+        page.fill("#prixpublic", record.prixpublic)
        
-        page.select_option("#iddelai",iddelai)
+        page.select_option("#iddelai", record.iddelai)
 
 
     
@@ -115,11 +336,23 @@ class OptionsUploaderThread(QThread):
     def handle_submission_result(self, page):
         if page.query_selector('text="Option déjà créée"'):
             self.log_update.emit("Product already exists. Skipping...")
+            return RESULT_EXISTS
         elif page.query_selector('text="Session expirée"'):
             self.log_update.emit("Session expired. Attempting to log in again...")
             self.login(page)
+            return RESULT_EXPIRED
         elif page.query_selector('text="Option ajoutée avec succès"'):
             self.log_update.emit("Option added successfully.")
+            return RESULT_ADDED
+        else:
+            self.log_update.emit("Unexpected result after submission. Please check manually.")
+            return RESULT_UNEXPECTED
+
+    def log_result(self, result):
+        if result == RESULT_EXISTS:
+            self.log_update.emit("Product already exists. Skipping...")
+        elif result == RESULT_ADDED:
+            self.log_update.emit("Option added successfully.")
         else:
             self.log_update.emit("Unexpected result after submission. Please check manually.")
 
@@ -185,6 +418,22 @@ class OptionsUploaderGUI(QWidget):
         self.headless_checkbox.setChecked(True)
         upload_layout.addWidget(self.headless_checkbox)
 
+        workers_layout = QHBoxLayout()
+        workers_layout.addWidget(QLabel('Parallel workers'))
+        self.workers_input = QSpinBox()
+        self.workers_input.setRange(1, MAX_WORKERS)
+        self.workers_input.setValue(1)
+        workers_layout.addWidget(self.workers_input)
+        upload_layout.addLayout(workers_layout)
+
+        engine_layout = QHBoxLayout()
+        engine_layout.addWidget(QLabel('Engine'))
+        self.engine_input = QComboBox()
+        self.engine_input.addItem('Browser (Playwright)', ENGINE_PLAYWRIGHT)
+        self.engine_input.addItem('HTTP (browserless)', ENGINE_HTTP)
+        engine_layout.addWidget(self.engine_input)
+        upload_layout.addLayout(engine_layout)
+
         self.upload_button = QPushButton('Upload Options')
         self.upload_button.clicked.connect(self.start_upload)
         upload_layout.addWidget(self.upload_button)
@@ -315,7 +564,7 @@ class OptionsUploaderGUI(QWidget):
         self.button_animation.setEasingCurve(QEasingCurve.OutCubic)
 
     def browse_file(self):
-        file_name, _ = QFileDialog.getOpenFileName(self, "Select Excel File", "", "Excel Files (*.xlsx *.xls)")
+        file_name, _ = QFileDialog.getOpenFileName(self, "Select Options File", "", "Option Files (*.xlsx *.xlsm *.xls *.csv *.parquet)")
         if file_name:
             self.file_label.setText(f'Selected File: {file_name}')
             self.excel_file = file_name
@@ -333,9 +582,11 @@ class OptionsUploaderGUI(QWidget):
             return
 
         headless = self.headless_checkbox.isChecked()
+        workers = self.workers_input.value()
+        engine = self.engine_input.currentData()
 
     # Create and start the upload thread
-        self.upload_thread = OptionsUploaderThread(self.excel_file, username, password, headless)
+        self.upload_thread = OptionsUploaderThread(self.excel_file, username, password, headless, workers, engine)
         self.upload_thread.progress_update.connect(self.update_progress)
         self.upload_thread.status_update.connect(self.update_status)
         self.upload_thread.error_occurred.connect(self.show_error_message)
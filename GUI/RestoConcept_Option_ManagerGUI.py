@@ -2,8 +2,8 @@
 
 
 
+import os
 import sys
-import time
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, 
                              QLineEdit, QTextEdit, QProgressBar, QMessageBox, QGridLayout, QFrame,
@@ -11,41 +11,110 @@ from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QP
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QIcon
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from context_factory import new_context
+from option_group_cache import OptionGroupCache, crawl_option_groups, page_shows_group
+from session_store import SessionStore, session_is_valid
+from wait_strategy import EventWaits, StepTimer, WAIT_STRATEGIES
+
+BASE_URL = "https://www.restoconcept.com"
+MIN_SEARCH_PREFIX = 3
+
+# Rows of the "Ajouter/retirer des options" results: checkbox name, state and the texts of its row.
+OPTION_ROWS_JS = """
+els => els.map(el => ({
+    name: el.name,
+    checked: el.checked,
+    cells: Array.from((el.closest('tr') || el.parentElement).querySelectorAll('td')).map(td => td.innerText.trim()),
+}))
+"""
+
+
+def normalize_name(name):
+    return " ".join(name.split()).lower()
+
+
+def plan_searches(option_names):
+    """
+    Group the requested names by their first word and return (search term,
+    names) pairs: one search on the common prefix of each group when it is
+    long enough, otherwise one search per name.
+    """
+    clusters = {}
+    for name in option_names:
+        key = normalize_name(name).split(" ")[0] if name.strip() else ""
+        clusters.setdefault(key, []).append(name)
+
+    searches = []
+    for names in clusters.values():
+        prefix = os.path.commonprefix([normalize_name(name) for name in names]).strip()
+        if len(names) > 1 and len(prefix) >= MIN_SEARCH_PREFIX:
+            searches.append((" ".join(names[0].split())[:len(prefix)], names))
+        else:
+            searches.extend((name, [name]) for name in names)
+    return searches
+
+
 class PlaywrightWorker(QThread):
     progress_update = pyqtSignal(int)
     status_update = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
 
-    def __init__(self, username, password, group_name, options, headless):
+    def __init__(self, username, password, group_name, options, headless, wait_strategy=EventWaits.name, timeouts=None,
+                 batch=False, resource_profile=None):
         super().__init__()
         self.username = username
         self.password = password
         self.group_name = group_name
         self.options = options
         self.headless = headless
+        self.batch = batch
+        self.resource_profile = resource_profile
+        self.base_url = BASE_URL
+        self.session_store = SessionStore()
+        self.group_cache = OptionGroupCache()
+        self.waits = WAIT_STRATEGIES[wait_strategy](timeouts)
+        self.timer = StepTimer()
 
     def run(self):
         with sync_playwright() as p:
             try:
                 browser = p.chromium.launch(headless=self.headless)
-                context = browser.new_context()
+                context, blocking_stats = new_context(
+                    browser, self.resource_profile, base_url=self.base_url,
+                    storage_state=self.session_store.load(self.username, self.base_url)
+                )
                 page = context.new_page()
 
-                if not self.login(page):
+                if not self.ensure_login(page):
                     return
 
                 if not self.navigate_to_option_group(page, self.group_name):
                     return
 
+                if self.batch:
+                    self.add_options_batch(page, self.options)
+                    for line in self.timer.report():
+                        self.status_update.emit(line)
+                    self.status_update.emit(blocking_stats.summary())
+                    self.status_update.emit("Process completed successfully.")
+                    return
+
                 total_options = len(self.options)
                 for i, option_name in enumerate(self.options, 1):
-                    if not self.add_option_to_group(page, option_name):
+                    with self.timer.step("option"):
+                        added = self.add_option_to_group(page, option_name)
+                        if added:
+                            self.waits.pause()
+                    if not added:
                         continue
                     progress = int((i / total_options) * 100)
                     self.progress_update.emit(progress)
                     self.status_update.emit(f"Added option: {option_name}")
-                    time.sleep(1)
 
+                for line in self.timer.report():
+                    self.status_update.emit(line)
+                self.status_update.emit(blocking_stats.summary())
                 self.status_update.emit("Process completed successfully.")
             except Exception as e:
                 self.error_occurred.emit(f"An unexpected error occurred: {str(e)}")
@@ -55,10 +124,16 @@ class PlaywrightWorker(QThread):
                 if 'browser' in locals():
                     browser.close()
 
+    def ensure_login(self, page):
+        if session_is_valid(page.context, self.base_url):
+            self.status_update.emit("Reusing saved session.")
+            return True
+        return self.login(page)
+
     def login(self, page):
         try:
             self.status_update.emit("Logging in...")
-            page.goto("https://www.restoconcept.com/admin/logon.asp")
+            page.goto(f"{self.base_url}/admin/logon.asp")
             page.fill("#adminuser", self.username)
             page.fill("#adminPass", self.password)
             page.click("#btn1")
@@ -66,8 +141,10 @@ class PlaywrightWorker(QThread):
             try:
                 page.wait_for_selector('td[align="center"][style="background-color:#eeeeee"]:has-text("© Copyright 2024 - Restoconcept")', timeout=5000)
                 self.status_update.emit("Login successful.")
+                self.session_store.save(self.username, self.base_url, page.context.storage_state())
                 return True
             except PlaywrightTimeoutError:
+                self.session_store.clear(self.username, self.base_url)
                 self.error_occurred.emit("Login failed. Please check your username and password.")
                 return False
         except Exception as e:
@@ -77,35 +154,63 @@ class PlaywrightWorker(QThread):
     def navigate_to_option_group(self, page, group_name):
         try:
             self.status_update.emit(f"Navigating to option group: {group_name}")
-            page.goto("https://www.restoconcept.com/admin/options/optionsgroupslist.asp")
-            page.fill("#psearch", group_name)
-            page.click('button:has-text("Rechercher")')
+            if self.open_cached_group(page, group_name):
+                return True
 
-            page.wait_for_load_state("networkidle")
+            page.goto(f"{self.base_url}/admin/options/optionsgroupslist.asp")
+            page.fill("#psearch", group_name)
+            with self.timer.step("group search"):
+                self.waits.search(page, lambda: page.click('button:has-text("Rechercher")'))
             
             if page.locator('img[alt=" Ajouter/retirer des options "]').count() == 0:
                 self.error_occurred.emit(f"Option group '{group_name}' not found. Please check the group name.")
                 return False
             
-            page.click('img[alt=" Ajouter/retirer des options "]')
-            page.wait_for_load_state("networkidle")
+            with self.timer.step("group page"):
+                self.waits.navigate(page, lambda: page.click('img[alt=" Ajouter/retirer des options "]'))
+            self.group_cache.set(self.base_url, group_name, page.url)
             return True
         except Exception as e:
             self.error_occurred.emit(f"Error navigating to option group: {str(e)}")
             return False
 
+    def open_cached_group(self, page, group_name):
+        """
+        Go straight to the group's options page when its URL is cached. The
+        first lookup on a site fills the cache from the whole groups list.
+        A cached page without the option search form or without the group's
+        name (deleted or renamed group) is stale: it is dropped and False is
+        returned so the caller searches the group again.
+        """
+        url = self.group_cache.get(self.base_url, group_name)
+        if url is None and not self.group_cache.has_site(self.base_url):
+            found = crawl_option_groups(page.context, self.base_url, self.group_cache)
+            self.status_update.emit(f"Cached {found} option groups.")
+            url = self.group_cache.get(self.base_url, group_name)
+        if url is None:
+            return False
+
+        with self.timer.step("group page"):
+            response = page.goto(url, wait_until="domcontentloaded")
+        if (response is not None and response.ok and "logon.asp" not in page.url
+                and page.locator('input[name="rch"]').count() and page_shows_group(page, group_name)):
+            return True
+        self.status_update.emit(f"Cached page of option group '{group_name}' is stale, searching again.")
+        self.group_cache.discard(self.base_url, group_name)
+        return False
+
     def add_option_to_group(self, page, option_name):
         try:
             self.status_update.emit(f"Adding option: {option_name}")
             page.fill('input[name="rch"]', option_name)
-            page.click('button:has-text("Rechercher")')
-            page.wait_for_load_state("networkidle")
+            with self.timer.step("search"):
+                self.waits.search(page, lambda: page.click('button:has-text("Rechercher")'))
             
             checkbox = page.locator('input[type="checkbox"][name="inclure0"]')
             if checkbox.is_visible():
                 checkbox.check()
-                page.click("button:has-text('Mettre à jour')")
-                page.wait_for_load_state("networkidle")
+                with self.timer.step("update"):
+                    self.waits.update(page, lambda: page.click("button:has-text('Mettre à jour')"))
                 return True
             else:
                 self.error_occurred.emit(f"Option '{option_name}' not found. Skipping this option.")
@@ -114,6 +219,72 @@ class PlaywrightWorker(QThread):
             self.error_occurred.emit(f"Error adding option '{option_name}': {str(e)}")
             return False
 
+    def add_options_batch(self, page, option_names):
+        """
+        Add many options with as few searches as possible: names sharing a
+        prefix are looked up together, every exactly matching inclure* box of a
+        results page is ticked and "Mettre à jour" is submitted once per page.
+        Names not found by a shared search get a search of their own.
+
+        :return: Report dict with matched, already, ambiguous and missing names
+        """
+        report = {"matched": [], "already": [], "ambiguous": [], "missing": []}
+        pending = list(dict.fromkeys(option_names))
+        searches = plan_searches(pending)
+        searched = set()
+        total = len(pending)
+
+        while searches:
+            term, names = searches.pop(0)
+            names = [name for name in names if name in pending]
+            if not names:
+                continue
+            searched.add(term)
+
+            try:
+                self.status_update.emit(f"Searching options: {term}")
+                page.fill('input[name="rch"]', term)
+                with self.timer.step("search"):
+                    self.waits.search(page, lambda: page.click('button:has-text("Rechercher")'))
+
+                rows = page.eval_on_selector_all('input[type="checkbox"][name^="inclure"]', OPTION_ROWS_JS)
+                to_check = []
+                for name in names:
+                    wanted = normalize_name(name)
+                    found = [row for row in rows if any(normalize_name(cell) == wanted for cell in row["cells"])]
+                    if len(found) > 1:
+                        report["ambiguous"].append(name)
+                    elif found and found[0]["checked"]:
+                        report["already"].append(name)
+                    elif found:
+                        report["matched"].append(name)
+                        to_check.append(found[0]["name"])
+                    else:
+                        continue
+                    pending.remove(name)
+
+                if to_check:
+                    for checkbox_name in to_check:
+                        page.check(f'input[type="checkbox"][name="{checkbox_name}"]')
+                    with self.timer.step("update"):
+                        self.waits.update(page, lambda: page.click("button:has-text('Mettre à jour')"))
+            except Exception as e:
+                self.error_occurred.emit(f"Error searching options '{term}': {str(e)}")
+
+            # Names a shared search did not bring back get a search of their own.
+            searches.extend((name, [name]) for name in names if name in pending and name not in searched)
+            self.progress_update.emit(int((total - len(pending)) / total * 100))
+
+        report["missing"] = pending
+        self.status_update.emit(
+            f"Batch report: {len(report['matched'])} added, {len(report['already'])} already in group, "
+            f"{len(report['ambiguous'])} ambiguous, {len(report['missing'])} missing."
+        )
+        for key, label in (("ambiguous", "Ambiguous"), ("missing", "Missing")):
+            if report[key]:
+                self.status_update.emit(f"{label}: {', '.join(report[key])}")
+        return report
+
 class MainWindow(QWidget):
     def __init__(self):
         super().__init__()
@@ -170,6 +341,9 @@ class MainWindow(QWidget):
         self.headless_checkbox.setChecked(True)
         left_layout.addWidget(self.headless_checkbox)
 
+        self.batch_checkbox = QCheckBox('Batch mode (one update per search page)')
+        left_layout.addWidget(self.batch_checkbox)
+
         self.start_button = QPushButton('Start Process')
         self.start_button.clicked.connect(self.start_process)
         left_layout.addWidget(self.start_button)
@@ -271,12 +445,13 @@ class MainWindow(QWidget):
         group_name = self.group_input.text().strip()
         options = [self.options_list.item(i).text() for i in range(self.options_list.count())]
         headless = self.headless_checkbox.isChecked()
+        batch = self.batch_checkbox.isChecked()
 
         if not username or not password or not group_name or not options:
             QMessageBox.warning(self, 'Input Error', 'Please fill in all fields and add at least one option.')
             return
 
-        self.worker = PlaywrightWorker(username, password, group_name, options, headless)
+        self.worker = PlaywrightWorker(username, password, group_name, options, headless, batch=batch)
         self.worker.progress_update.connect(self.update_progress)
         self.worker.status_update.connect(self.update_status)
         self.worker.error_occurred.connect(self.show_error)
@@ -8,72 +8,84 @@ from plyer import notification
 import pandas as pd
 import altair as alt
 
-def clean_price(price_str):
-    if isinstance(price_str, str):
-        # Clean string prices by removing '€' and commas
-        return float(price_str.replace('€', '').replace(',', '').strip())
-    else:
-        # If it's already a number, just return it as float
-        return float(price_str)
+def clean_prices(prices):
+    # Strip '€' and thousands commas from the whole column, then parse it in one pass
+    text = prices.astype(str).str.replace('€', '', regex=False).str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(text, errors='coerce')
+
+def read_price_columns(file):
+    # Read only columns A (reference) and C (price) in read-only mode
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(min_row=2, max_col=3, values_only=True)
+        data = pd.DataFrame(
+            ((row[0], row[2] if len(row) > 2 else None) for row in rows),
+            columns=['Reference', 'Price'],
+        )
+    finally:
+        workbook.close()
+    # Skip blank rows; later rows win for duplicated references, as with the previous dict-based lookup
+    return data.dropna(subset=['Reference']).drop_duplicates('Reference', keep='last')
+
+def diff_files(file1, file2):
+    old = read_price_columns(file1)
+    new = read_price_columns(file2)
+
+    merged = new.merge(old, on='Reference', how='outer', suffixes=('_new', '_old'), indicator=True, sort=False)
+    merged['New Value'] = clean_prices(merged['Price_new'])
+    merged['Old Value'] = clean_prices(merged['Price_old'])
+
+    both = merged['_merge'] == 'both'
+    numeric = merged['New Value'].notna() & merged['Old Value'].notna()
+    # Compare parsed prices when both parse, raw cell values otherwise
+    changed = both & ((numeric & (merged['New Value'] != merged['Old Value']))
+                      | (~numeric & (merged['Price_new'].astype(str) != merged['Price_old'].astype(str))))
+
+    price_changes = merged.loc[changed, ['Reference', 'Price_old', 'Price_new']].rename(
+        columns={'Price_old': 'Old Price', 'Price_new': 'New Price'})
+    price_changes['Difference'] = (merged['New Value'] - merged['Old Value'])[changed]
+    new_products = merged.loc[merged['_merge'] == 'left_only', ['Reference', 'Price_new']].rename(
+        columns={'Price_new': 'Price'})
+    products_to_deactivate = merged.loc[merged['_merge'] == 'right_only', 'Reference']
+
+    return (price_changes.reset_index(drop=True), new_products.reset_index(drop=True),
+            products_to_deactivate.reset_index(drop=True))
 
 def compare_files(file1, file2):
-    old_wb = openpyxl.load_workbook(file1)
-    new_wb = openpyxl.load_workbook(file2)
-    old_sheet = old_wb.active
-    new_sheet = new_wb.active
-    
-    price_changes = []
-    new_products = []
-    products_to_deactivate = []
-    
-    old_data = {old_sheet[f'A{i}'].value: old_sheet[f'C{i}'].value for i in range(2, old_sheet.max_row + 1)}
-    new_data = {new_sheet[f'A{i}'].value: new_sheet[f'C{i}'].value for i in range(2, new_sheet.max_row + 1)}
-    
-    # Check for price changes and new products
-    for ref, new_price in new_data.items():
-        if ref in old_data:
-            old_price = old_data[ref]
-            if old_price != new_price:
-                price_changes.append((ref, old_price, new_price))
-        else:
-            # If the product reference is new
-            new_products.append((ref, new_price))
-    
-    # Check for products to deactivate
-    for ref in old_data:
-        if ref not in new_data:
-            products_to_deactivate.append(ref)
-    
-    return price_changes, new_products, products_to_deactivate
+    price_changes, new_products, products_to_deactivate = diff_files(file1, file2)
+    return (
+        list(price_changes[['Reference', 'Old Price', 'New Price']].itertuples(index=False, name=None)),
+        list(new_products.itertuples(index=False, name=None)),
+        products_to_deactivate.tolist(),
+    )
 
 def notify_changes(price_changes, new_products, products_to_deactivate):
     today = datetime.now().strftime("%Y-%m-%d")
     filename = f"price_changes_{today}.txt"
     
+    # price_changes, new_products and products_to_deactivate are the frames returned by diff_files
     with open(filename, 'w') as f:
-        if price_changes:
+        if len(price_changes):
             f.write(f"{len(price_changes)} products have price changes:\n")
-            for ref, old, new in price_changes:
-                diff = clean_price(new) - clean_price(old)
-                f.write(f"Reference {ref}: Old Price {old}, New Price {new}, Difference: {diff}\n")
+            rows = price_changes[['Reference', 'Old Price', 'New Price', 'Difference']].itertuples(index=False, name=None)
+            f.writelines(f"Reference {ref}: Old Price {old}, New Price {new}, Difference: {diff}\n" for ref, old, new, diff in rows)
         else:
             f.write("No price changes detected this week.\n")
         
         f.write("\n")  # Add a blank line for separation
         
-        if new_products:
+        if len(new_products):
             f.write(f"{len(new_products)} new products found:\n")
-            for ref, price in new_products:
-                f.write(f"Reference {ref}, Price: {price}\n")
+            rows = new_products[['Reference', 'Price']].itertuples(index=False, name=None)
+            f.writelines(f"Reference {ref}, Price: {price}\n" for ref, price in rows)
         else:
             f.write("No new products found this week.\n")
         
         f.write("\n")  # Add a blank line for separation
         
-        if products_to_deactivate:
+        if len(products_to_deactivate):
             f.write(f"{len(products_to_deactivate)} products to deactivate:\n")
-            for ref in products_to_deactivate:
-                f.write(f"Reference {ref}\n")
+            f.writelines(f"Reference {ref}\n" for ref in products_to_deactivate)
         else:
             f.write("No products to deactivate this week.\n")
     print(f"Detailed information has been written to {filename}")
@@ -96,14 +108,13 @@ def save_new_products(new_products):
     today = datetime.now().strftime("%Y-%m-%d")
     new_file = f"new_products_{today}.xlsx"
     
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
-    sheet['A1'] = 'Reference'
-    sheet['C1'] = 'Price'
+    # Write-only workbook: rows are streamed instead of addressed cell by cell
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['Reference', None, 'Price'])
     
-    for idx, product in enumerate(new_products, start=2):
-        sheet[f'A{idx}'] = product[0]  # Reference
-        sheet[f'C{idx}'] = product[1]  # Price
+    for ref, price in new_products[['Reference', 'Price']].itertuples(index=False, name=None):
+        sheet.append([ref, None, price])
     
     workbook.save(new_file)
     print(f"New products saved to {new_file}")
@@ -119,8 +130,8 @@ def main():
     file2 = st.sidebar.file_uploader("Select the newer Excel file", type=["xlsx"])
 
     if file1 and file2:
-        # Call the compare_files function
-        price_changes, new_products, products_to_deactivate = compare_files(file1, file2)
+        # Call the diff_files function
+        price_changes, new_products, products_to_deactivate = diff_files(file1, file2)
 
         # Call the notify_changes function
         num_price_changes = notify_changes(price_changes, new_products, products_to_deactivate)
@@ -132,9 +143,8 @@ def main():
 
         # Display the results
         st.subheader("Price Changes")
-        price_changes_df = pd.DataFrame(price_changes, columns=['Reference', 'Old Price', 'New Price'])
-        price_changes_df['Difference'] = price_changes_df['New Price'] - price_changes_df['Old Price']
-        price_changes_df['Difference'] = price_changes_df['Difference'].apply(lambda x: f"+{x:.2f}" if x > 0 else f"{x:.2f}")
+        price_changes_df = price_changes.copy()
+        price_changes_df['Difference'] = price_changes_df['Difference'].map(lambda x: f"+{x:.2f}" if x > 0 else f"{x:.2f}")
         
         # Convert 'Difference' to string before applying the style
         price_changes_df = price_changes_df.style.applymap(
@@ -1,47 +1,41 @@
 
 
 import streamlit as st
-import pdfplumber
-import pandas as pd
 import os
+import tempfile
 from pathlib import Path
 
-def extract_product_data(pdf_path):
-    products = {}
-    all_tables = []  # List to store all tables from the PDF
+from pdf_extraction import PageTableCache, default_workers, iter_page_tables, merge_product_tables, page_count
+from table_output import FORMATS, open_table_writer
+
+def extract_product_data(pdf_path, writer, workers=1, on_page=None, cache=None):
+    """
+    Extract every page and stream its tables to the writer as soon as the page is done.
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            tables = page.extract_tables()
-            for table_num, table in enumerate(tables):
-                all_tables.append(table)
-                headers = table[0]
-                for col in range(len(headers)):
-                    product_name = headers[col]
-                    if product_name and product_name.strip():
-                        if product_name not in products:
-                            products[product_name] = {}
-                        for row in table[1:]:
-                            if len(row) > col:
-                                characteristic = row[0]
-                                value = row[col]
-                                if characteristic and value:
-                                    products[product_name][characteristic.strip()] = value.strip()
-    return products, all_tables
+    :param writer: table_output writer receiving the tables in page order
+    :param workers: Processes extracting pages in parallel
+    :param on_page: Called with (pages done, total pages) after each page
+    :param cache: PageTableCache reused for pages whose content did not change
+    :return: (products, number of tables written)
+    """
+    products = {}
+    table_count = 0
 
-def save_tables_to_excel(all_tables, excel_path):
-    with pd.ExcelWriter(excel_path, engine='xlsxwriter') as writer:
-        row_position = 0  # Track the current row position in the Excel sheet
-        for table_index, table in enumerate(all_tables):
-            df = pd.DataFrame(table[1:], columns=table[0])  # Create DataFrame from the table, excluding headers
-            df.to_excel(writer, sheet_name='Extracted Data', startrow=row_position, index=False, header=True)
-            row_position += len(df) + 2  # Add space between tables
+    total_pages = page_count(pdf_path)
+    for done, (page_num, tables) in enumerate(iter_page_tables(pdf_path, range(total_pages), workers, cache=cache), 1):
+        for table_index, table in enumerate(tables):
+            writer.write_table(page_num, table_index, table)
+        table_count += len(tables)
+        merge_product_tables(products, tables)
+        if on_page is not None:
+            on_page(done, total_pages)
+    return products, table_count
 
 # Streamlit App
 st.set_page_config(page_title="PDF to Excel Extractor", layout="centered")
 
 st.title("📄 PDF to Excel Extractor")
-st.write("Upload a PDF file to extract tables and save them directly to your Downloads folder as an Excel file.")
+st.write("Upload a PDF file to extract tables and save them directly to your Downloads folder as an Excel, CSV or Parquet file.")
 
 uploaded_file = st.file_uploader("Upload your PDF file", type="pdf")
 
@@ -49,19 +43,37 @@ if uploaded_file:
     # Get the Downloads folder path
     downloads_path = str(Path.home() / "Downloads")
     
-    # Default filename for the output Excel file
-    excel_file = os.path.join(downloads_path, "Extracted_Tables.xlsx")
+    output_format = st.selectbox("Output format", list(FORMATS), format_func=FORMATS.get)
+
+    # Default filename for the output file
+    excel_file = os.path.join(downloads_path, f"Extracted_Tables.{output_format}")
+
+    workers = st.number_input("Worker processes", min_value=1, max_value=os.cpu_count() or 1, value=default_workers())
+    use_cache = st.checkbox("Reuse pages extracted from earlier uploads", value=True)
     
     if st.button("Extract and Save to Downloads"):
         with st.spinner("Processing the PDF..."):
             try:
-                # Extract product data
-                _, all_tables = extract_product_data(uploaded_file)
-                
-                # Save tables to Excel in the Downloads folder
-                save_tables_to_excel(all_tables, excel_file)
+                # Worker processes open the PDF themselves: give them a file on disk
+                with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+                    tmp.write(uploaded_file.getbuffer())
+                progress = st.progress(0.0)
+                cache = PageTableCache() if use_cache else None
+                try:
+                    # Extract product data, writing tables to the Downloads folder as pages finish
+                    with open_table_writer(excel_file, output_format) as writer:
+                        _, table_count = extract_product_data(
+                            tmp.name, writer, int(workers),
+                            lambda done, total: progress.progress(done / total, text=f"Page {done}/{total}"),
+                            cache
+                        )
+                finally:
+                    os.unlink(tmp.name)
+                if cache is not None:
+                    cache.evict()
+                    st.caption(cache.summary())
                 
-                st.success(f"Data successfully saved to {excel_file}")
+                st.success(f"{table_count} tables successfully saved to {excel_file}")
                 st.balloons()  # Add a festive animation for success
             except Exception as e:
                 st.error(f"An error occurred: {e}")
@@ -0,0 +1,137 @@
+"""
+Concurrent crawl of the paginated product listing of SA_prod.asp.
+
+Instead of clicking "Suiv." and waiting for each result page in turn, the
+crawler reads the numbered pagination links of the first page, derives the
+URL of every other page from them and fetches those pages in parallel over
+the context's request client (same cookies, no rendering). "Editer" hrefs
+are collected in page order and deduplicated. When the pagination has no
+usable numbered links, the "Suiv." links are followed one by one instead.
+"""
+import asyncio
+from html.parser import HTMLParser
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+DEFAULT_CONCURRENCY = 8
+EDIT_LINK_TEXT = "Editer"
+NEXT_LINK_TEXT = "Suiv."
+
+
+class _LinkParser(HTMLParser):
+    """
+    Collect the (text, href) pair of every anchor of a page.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self._href = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self._href = dict(attrs).get("href")
+            self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._href is not None:
+            self.links.append(("".join(self._text).strip(), self._href))
+            self._href = None
+
+
+class ListingPage:
+    def __init__(self, url, html):
+        """
+        :param url: URL the page was served from, used to resolve relative hrefs
+        :param html: Page source
+        """
+        parser = _LinkParser()
+        parser.feed(html)
+        self.url = url
+        self.edit_links = [urljoin(url, href) for text, href in parser.links if EDIT_LINK_TEXT in text]
+        self.page_links = {int(text): urljoin(url, href) for text, href in parser.links if text.isdigit()}
+        self.next_url = next((urljoin(url, href) for text, href in parser.links if NEXT_LINK_TEXT in text), None)
+
+    def page_template(self):
+        """
+        Return (url, parameter) of a numbered link whose query carries its page
+        number, or None when the page number cannot be found in the URLs.
+        """
+        for number, url in self.page_links.items():
+            for name, value in parse_qsl(urlparse(url).query, keep_blank_values=True):
+                if value == str(number):
+                    return url, name
+        return None
+
+
+def page_url(template_url, parameter, number):
+    """
+    Rewrite the page parameter of a pagination URL.
+    """
+    parts = urlparse(template_url)
+    query = [(name, str(number) if name == parameter else value)
+             for name, value in parse_qsl(parts.query, keep_blank_values=True)]
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+
+def _dedupe(links):
+    return list(dict.fromkeys(links))
+
+
+async def _fetch(request, url):
+    response = await request.get(url)
+    if not response.ok:
+        raise Exception(f"Listing page {url} returned HTTP {response.status}")
+    return ListingPage(url, await response.text())
+
+
+async def crawl_listing(request, first_url, first_html, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Collect the edit links of every result page of a listing.
+
+    :param request: APIRequestContext sharing the admin session, e.g. page.context.request
+    :param first_url: URL of the first result page, already loaded in the browser
+    :param first_html: Source of that page
+    :param concurrency: Listing pages fetched at the same time
+    :return: Absolute edit URLs in page order, without duplicates
+    """
+    first = ListingPage(first_url, first_html)
+    template = first.page_template()
+    if template is None:
+        return _dedupe(await _crawl_serial(request, first))
+
+    template_url, parameter = template
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(number):
+        async with semaphore:
+            return number, await _fetch(request, page_url(template_url, parameter, number))
+
+    pages = {1: first}
+    last = max(first.page_links, default=1)
+    # Pagination may only show a window of page numbers: keep going while the
+    # fetched pages reveal higher ones.
+    while True:
+        missing = [number for number in range(2, last + 1) if number not in pages]
+        if not missing:
+            break
+        for number, listing in await asyncio.gather(*(fetch(number) for number in missing)):
+            pages[number] = listing
+            last = max([last] + list(listing.page_links))
+
+    return _dedupe(link for number in sorted(pages) for link in pages[number].edit_links)
+
+
+async def _crawl_serial(request, first):
+    links = list(first.edit_links)
+    seen = {first.url}
+    listing = first
+    while listing.next_url and listing.next_url not in seen:
+        seen.add(listing.next_url)
+        listing = await _fetch(request, listing.next_url)
+        links.extend(listing.edit_links)
+    return links
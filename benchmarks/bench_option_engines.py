@@ -0,0 +1,62 @@
+"""
+Compare the Playwright and HTTP option engines of OptionsUploaderThread
+against the local mock admin server.
+
+    python benchmarks/bench_option_engines.py --rows 300 --workers 1 4 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from PyQt5.QtCore import QCoreApplication
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "GUI"))
+
+from bench_options_upload import write_sheet
+from mock_admin_server import MockAdminServer
+from OptionsUploaderGUI import ENGINE_HTTP, ENGINE_PLAYWRIGHT, OptionsUploaderThread
+
+
+def run_upload(server, excel_file, workers, engine):
+    thread = OptionsUploaderThread(excel_file, "bench", "bench", True, workers, engine)
+    thread.base_url = server.url
+    log = []
+    thread.log_update.connect(log.append)
+
+    start = time.perf_counter()
+    thread.run()
+    elapsed = time.perf_counter() - start
+    added = sum(message == "Option added successfully." for message in log)
+    fallbacks = sum(message.startswith("Falling back") for message in log)
+    return elapsed, added, fallbacks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every mock response")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    with MockAdminServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        # Keep the upload journal, sessions and group cache of benchmark runs out of the user's.
+        os.environ["RESTOCONCEPT_JOURNAL"] = os.path.join(tmp, "journal.sqlite3")
+        os.environ["RESTOCONCEPT_SESSION_DIR"] = os.path.join(tmp, "sessions")
+        os.environ["RESTOCONCEPT_GROUP_CACHE"] = os.path.join(tmp, "option_groups.json")
+        print(f"Mock admin on {server.url}, {args.rows} rows, latency {args.latency * 1000:.0f} ms")
+        print(f"{'engine':>11} {'workers':>8} {'seconds':>9} {'rows/min':>10} {'added':>6} {'fallbacks':>10}")
+        for engine in (ENGINE_PLAYWRIGHT, ENGINE_HTTP):
+            for workers in args.workers:
+                excel_file = os.path.join(tmp, f"options_{engine}_{workers}.xlsx")
+                write_sheet(excel_file, args.rows, f"{engine}{workers}")
+                elapsed, added, fallbacks = run_upload(server, excel_file, workers, engine)
+                rate = args.rows / elapsed * 60
+                print(f"{engine:>11} {workers:>8} {elapsed:>9.1f} {rate:>10.0f} {added:>6} {fallbacks:>10}")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
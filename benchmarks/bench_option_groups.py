@@ -0,0 +1,68 @@
+"""
+Timing report of PlaywrightWorker adding options to a group with the old
+networkidle waits, with the event-driven waits and in batch mode, against
+the local mock admin server.
+
+    python benchmarks/bench_option_groups.py --options 200 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from PyQt5.QtCore import QCoreApplication
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "GUI"))
+
+from mock_admin_server import MockAdminServer
+from RestoConcept_Option_ManagerGUI import PlaywrightWorker
+from wait_strategy import WAIT_STRATEGIES
+
+
+def run_worker(server, group_name, options, wait_strategy, batch=False):
+    worker = PlaywrightWorker("bench", "bench", group_name, options, True, wait_strategy, batch=batch)
+    worker.base_url = server.url
+    report, errors = [], []
+    worker.status_update.connect(lambda message: message.startswith(("Timing", "  ", "Batch")) and report.append(message))
+    worker.error_occurred.connect(errors.append)
+
+    start = time.perf_counter()
+    worker.run()
+    return time.perf_counter() - start, report, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--options", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every mock response")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    with MockAdminServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        # Keep the sessions and group cache of benchmark runs out of the user's.
+        os.environ["RESTOCONCEPT_SESSION_DIR"] = os.path.join(tmp, "sessions")
+        os.environ["RESTOCONCEPT_GROUP_CACHE"] = os.path.join(tmp, "option_groups.json")
+        elapsed = {}
+        runs = [(wait_strategy, False) for wait_strategy in WAIT_STRATEGIES] + [("event", True)]
+        for wait_strategy, batch in runs:
+            label = f"{wait_strategy}{' batch' if batch else ''}"
+            names = [f"Option {label} {i:04d}" for i in range(args.options)]
+            server.state.add_options(names)
+            group_name = f"Groupe {label}"
+            server.state.add_group(group_name)
+
+            elapsed[label], report, errors = run_worker(server, group_name, names, wait_strategy, batch)
+            print(f"[{label}] {args.options} options in {elapsed[label]:.1f} s, {len(errors)} errors")
+            for line in report:
+                print(line)
+
+        baseline = elapsed["networkidle"]
+        for label in ("event", "event batch"):
+            print(f"Wall-clock {label}: {baseline:.1f} s -> {elapsed[label]:.1f} s "
+                  f"({elapsed[label] / baseline:.0%} of the networkidle run)")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Rows/minute of OptionsUploaderThread for several worker counts, measured
+against the local mock admin server.
+
+    python benchmarks/bench_options_upload.py --rows 200 --workers 1 2 4 8 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from PyQt5.QtCore import QCoreApplication
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "GUI"))
+
+from mock_admin_server import MockAdminServer
+from OptionsUploaderGUI import OptionsUploaderThread
+
+
+def write_sheet(path, rows, prefix):
+    pd.DataFrame({
+        "optionDescrip": [f"Option {prefix}-{i}" for i in range(rows)],
+        "ref": [f"{prefix}-{i}" for i in range(rows)],
+        "pricetoadd": [10.5] * rows,
+        "prixpublic": [12.6] * rows,
+        "iddelai": [1] * rows,
+    }).to_excel(path, index=False)
+
+
+def run_upload(server, excel_file, workers):
+    thread = OptionsUploaderThread(excel_file, "bench", "bench", True, workers)
+    thread.base_url = server.url
+    errors = []
+    thread.error_occurred.connect(errors.append)
+    thread.log_update.connect(lambda message: ("Error processing" in message or "Critical error" in message) and errors.append(message))
+
+    start = time.perf_counter()
+    thread.run()  # run synchronously in this thread, the Qt event loop is not needed
+    return time.perf_counter() - start, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every mock response")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    with MockAdminServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        # Keep the upload journal, sessions and group cache of benchmark runs out of the user's.
+        os.environ["RESTOCONCEPT_JOURNAL"] = os.path.join(tmp, "journal.sqlite3")
+        os.environ["RESTOCONCEPT_SESSION_DIR"] = os.path.join(tmp, "sessions")
+        os.environ["RESTOCONCEPT_GROUP_CACHE"] = os.path.join(tmp, "option_groups.json")
+        print(f"Mock admin on {server.url}, {args.rows} rows, latency {args.latency * 1000:.0f} ms")
+        print(f"{'workers':>8} {'seconds':>9} {'rows/min':>10} {'speed-up':>9} {'errors':>7}")
+        baseline = None
+        for workers in args.workers:
+            excel_file = os.path.join(tmp, f"options_{workers}.xlsx")
+            write_sheet(excel_file, args.rows, f"W{workers}")
+            elapsed, errors = run_upload(server, excel_file, workers)
+            rate = args.rows / elapsed * 60
+            baseline = baseline or rate
+            print(f"{workers:>8} {elapsed:>9.1f} {rate:>10.0f} {rate / baseline:>8.2f}x {len(errors):>7}")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
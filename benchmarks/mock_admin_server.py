@@ -0,0 +1,443 @@
+"""
+Local stand-in for the Restoconcept admin pages used by the automation tools.
+
+It covers logon.asp, the option and option-group pages, the SA_prod.asp
+product list with "Suiv." pagination, SA_prod_edit.asp (photoplus, idf1,
+idOptionGroup and the idContentoEdit2 editor iframe) and public product
+pages. Latency, jitter, server errors and session expiry can be injected.
+
+Run it on its own with ``python benchmarks/mock_admin_server.py --port 8765``
+or start it from a benchmark with ``MockAdminServer(latency=0.05).start()``.
+"""
+import argparse
+import html
+import random
+import re
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FOOTER = '<table><tr><td align="center" style="background-color:#eeeeee">© Copyright 2024 - Restoconcept</td></tr></table>'
+
+
+PAGE_SIZE = 25
+PHOTOPLUS_VALUES = ("", "occasion.jpg", "promo.jpg")
+SUPPLIERS = {"1": "Fournisseur 1", "2": "Fournisseur 2", "3": "Fournisseur 3"}
+ADD_GROUP_STYLE = "font-family:arial; font-size:14px; cursor:pointer; background-color:#005c99; color:#fff; border:0; border-radius:3px; padding:3px 14px;"
+UPDATE_DESCRIPTION_STYLE = "font-family:arial; font-size:15px; cursor:pointer; background-color:#005c99; color:#fff; border:0; border-radius:3px; padding:3px 14px;"
+
+# Copies the editor iframe into the form field on submit, like the real editor does.
+EDITOR_SUBMIT_JS = (
+    "document.getElementById('descl').value = "
+    "document.getElementById('idContentoEdit2').contentDocument.body.innerHTML;"
+)
+
+
+def page(body):
+    return f"<html><head><meta charset='utf-8'></head><body>{body}{FOOTER}</body></html>"
+
+
+class MockAdminState:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, expire_rate=0.0, seed=None):
+        """
+        :param latency: Seconds added to every response
+        :param jitter: Extra random delay, uniform in [0, jitter] seconds
+        :param error_rate: Fraction of requests answered with HTTP 500
+        :param expire_rate: Fraction of requests that expire the caller's session first
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.expire_rate = expire_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sessions = set()
+        self.options = {}
+        self.groups = {}
+        self.products = {}
+        self.requests = 0
+        self.errors_injected = 0
+        self.expiries_injected = 0
+
+    def add_products(self, count, brands=("Marque A", "Marque B"), photoplus=PHOTOPLUS_VALUES[:1]):
+        """
+        Create `count` products spread over `brands`; returns their IDs.
+        """
+        with self.lock:
+            start = len(self.products) + 1
+            for product_id in range(start, start + count):
+                self.products[product_id] = {
+                    "ref": f"REF{product_id:05d}",
+                    "marque": brands[product_id % len(brands)],
+                    "supplier": "",
+                    "photoplus": photoplus[product_id % len(photoplus)],
+                    "groups": set(),
+                    "description": f"Description du produit {product_id}",
+                }
+            return list(range(start, start + count))
+
+    def brands(self):
+        with self.lock:
+            return sorted({product["marque"] for product in self.products.values()})
+
+    def add_group(self, name, options=()):
+        with self.lock:
+            group_id = len(self.groups) + 1
+            self.groups[group_id] = {"name": name, "options": set(options)}
+        return group_id
+
+    def add_options(self, names):
+        with self.lock:
+            for name in names:
+                self.options.setdefault(name, {"optionDescrip": name, "ref": name})
+
+    def option_names(self):
+        with self.lock:
+            return sorted(form.get("optionDescrip") or key for key, form in self.options.items())
+
+
+class MockAdminHandler(BaseHTTPRequestHandler):
+    server_version = "MockRestoconcept/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def session(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "ASPSESSIONID" and value in self.state.sessions:
+                return value
+        return None
+
+    def form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length).decode("utf-8")
+        return {key: values[-1] for key, values in parse_qs(data, keep_blank_values=True).items()}
+
+    def send_html(self, body, status=200, headers=None):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def redirect(self, location, headers=None):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        state = self.state
+        with state.lock:
+            state.requests += 1
+            delay = state.latency + (state.random.uniform(0, state.jitter) if state.jitter else 0)
+            fail = state.random.random() < state.error_rate
+            expire = state.random.random() < state.expire_rate
+        if delay:
+            time.sleep(delay)
+
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+        if url.path.endswith(".aspx"):
+            self.get_public_product(url.path)
+            return
+        handler = getattr(self, f"{method.lower()}_{url.path.strip('/').replace('/', '_').replace('.asp', '')}", None)
+        if handler is None:
+            self.send_html(page("<p>Page introuvable</p>"), status=404)
+            return
+        if fail:
+            with state.lock:
+                state.errors_injected += 1
+            self.send_html(page("<p>Erreur interne du serveur</p>"), status=500)
+            return
+        if expire and url.path != "/admin/logon.asp":
+            with state.lock:
+                state.sessions.discard(self.session())
+                state.expiries_injected += 1
+        if url.path != "/admin/logon.asp" and self.session() is None:
+            if method == "POST":
+                self.send_html(page("<p>Session expirée</p>"))
+            else:
+                self.redirect("/admin/logon.asp")
+            return
+        handler(query)
+
+    def get_admin_logon(self, query):
+        self.send_html(page(
+            '<form method="post" action="/admin/logon.asp">'
+            '<input id="adminuser" name="adminuser"><input id="adminPass" name="adminPass" type="password">'
+            '<button id="btn1" type="submit">Connexion</button></form>'
+        ))
+
+    def post_admin_logon(self, query):
+        form = self.form()
+        if not form.get("adminuser") or not form.get("adminPass"):
+            self.send_html(page("<p>Identifiants incorrects</p>"))
+            return
+        token = secrets.token_hex(8)
+        with self.state.lock:
+            self.state.sessions.add(token)
+        self.redirect("/admin/default.asp", {"Set-Cookie": f"ASPSESSIONID={token}; Path=/"})
+
+    def get_admin_default(self, query):
+        self.send_html(page('<a href="/admin/logoff.asp">Déconnexion</a>'))
+
+    def get_admin_options_optionsgroupslist(self, query):
+        search = query.get("psearch", "").lower()
+        rows = "".join(
+            f'<tr><td>{html.escape(group["name"])}</td><td>'
+            f'<a href="/admin/options/SA_optgrp_opts.asp?idOptionGroup={group_id}">'
+            '<img src="/img/options.gif" alt=" Ajouter/retirer des options "></a></td></tr>'
+            for group_id, group in self.state.groups.items()
+            if "psearch" in query and search in group["name"].lower()
+        )
+        self.send_html(page(
+            '<form method="get" action="/admin/options/optionsgroupslist.asp">'
+            '<input id="psearch" name="psearch"><button>Rechercher</button></form>'
+            f'<table>{rows}</table>'
+        ))
+
+    def group_options_page(self, group_id, search):
+        group = self.state.groups.get(group_id)
+        if group is None:
+            self.send_html(page("<p>Groupe introuvable</p>"), status=404)
+            return
+        matches = [name for name in self.state.option_names() if search and search.lower() in name.lower()]
+        rows = "".join(
+            f'<tr><td><input type="checkbox" name="inclure{i}" value="{html.escape(name)}"'
+            f'{" checked" if name in group["options"] else ""}></td><td>{html.escape(name)}</td></tr>'
+            for i, name in enumerate(matches)
+        )
+        self.send_html(page(
+            f'<h2>{html.escape(group["name"])}</h2>'
+            f'<form method="get" action="/admin/options/SA_optgrp_opts.asp">'
+            f'<input type="hidden" name="idOptionGroup" value="{group_id}">'
+            f'<input name="rch" value="{html.escape(search)}"><button>Rechercher</button></form>'
+            f'<form method="post" action="/admin/options/SA_optgrp_opts.asp?idOptionGroup={group_id}&amp;rch={html.escape(search)}">'
+            f'<table>{rows}</table><button type="submit">Mettre à jour</button></form>'
+        ))
+
+    def get_admin_options_SA_optgrp_opts(self, query):
+        self.group_options_page(int(query.get("idOptionGroup", 0)), query.get("rch", ""))
+
+    def post_admin_options_SA_optgrp_opts(self, query):
+        group_id = int(query.get("idOptionGroup", 0))
+        form = self.form()
+        with self.state.lock:
+            group = self.state.groups.get(group_id)
+            if group is not None:
+                group["options"].update(value for key, value in form.items() if key.startswith("inclure"))
+        self.group_options_page(group_id, query.get("rch", ""))
+
+    def get_admin_options_optionslist(self, query):
+        self.send_html(page('<a href="/admin/SA_opt_edit.asp?action=add">Ajouter une option</a>'))
+
+    def get_admin_SA_opt_edit(self, query):
+        delais = "".join(f'<option value="{i}">{i} jours</option>' for i in range(1, 6))
+        self.send_html(page(
+            '<form method="post" action="/admin/SA_opt_edit.asp?action=add">'
+            '<input type="hidden" name="action2" value="insert">'
+            '<input id="optionDescrip" name="optionDescrip"><input id="ref" name="ref">'
+            '<input id="pricetoadd" name="pricetoadd"><input id="prixpublic" name="prixpublic">'
+            f'<select id="iddelai" name="iddelai"><option value=""></option>{delais}</select>'
+            '<button type="submit" name="submit" value="Ajouter">Ajouter</button></form>'
+        ))
+
+    def post_admin_SA_opt_edit(self, query):
+        form = self.form()
+        key = form.get("ref") or form.get("optionDescrip")
+        with self.state.lock:
+            exists = key in self.state.options
+            self.state.options.setdefault(key, form)
+        message = "Option déjà créée" if exists else "Option ajoutée avec succès"
+        self.send_html(page(f"<p>{html.escape(message)}</p>"))
+
+
+    def get_admin_SA_prod(self, query):
+        brands = "".join(
+            f'<option value="{html.escape(brand)}"{" selected" if brand == query.get("marque") else ""}>{html.escape(brand)}</option>'
+            for brand in self.state.brands()
+        )
+        body = (
+            '<form method="get" action="/admin/SA_prod.asp">'
+            f'<select name="marque"><option value=""></option>{brands}</select>'
+            '<button type="submit">Rechercher</button></form>'
+        )
+        if "marque" in query:
+            with self.state.lock:
+                ids = sorted(
+                    product_id for product_id, product in self.state.products.items()
+                    if not query["marque"] or product["marque"] == query["marque"]
+                )
+                rows = [(product_id, dict(self.state.products[product_id])) for product_id in ids]
+            current = max(1, int(query.get("page", 1)))
+            pages = max(1, -(-len(rows) // PAGE_SIZE))
+            marque = html.escape(query["marque"])
+            body += "<table>" + "".join(
+                f'<tr><td>{product_id}</td><td>{html.escape(product["ref"])}</td><td>{html.escape(product["marque"])}</td>'
+                f'<td><a href="SA_prod_edit.asp?action=edit&amp;recid={product_id}">Editer</a></td></tr>'
+                for product_id, product in rows[(current - 1) * PAGE_SIZE:current * PAGE_SIZE]
+            ) + "</table><div class=\"pagination\">"
+            body += " ".join(
+                f'<a href="SA_prod.asp?marque={marque}&amp;page={number}">{number}</a>' if number != current else f"<b>{number}</b>"
+                for number in range(1, pages + 1)
+            )
+            if current < pages:
+                body += f' <a href="SA_prod.asp?marque={marque}&amp;page={current + 1}">Suiv.</a>'
+            body += "</div>"
+        self.send_html(page(body))
+
+    def get_admin_SA_prod_edit(self, query):
+        product_id = int(query.get("recid", 0))
+        with self.state.lock:
+            product = self.state.products.get(product_id)
+            product = dict(product, groups=set(product["groups"])) if product else None
+            groups = dict(self.state.groups)
+        if product is None:
+            self.send_html(page("<p>Produit introuvable</p>"), status=404)
+            return
+
+        photoplus = "".join(
+            f'<option value="{value}"{" selected" if value == product["photoplus"] else ""}>{value or "Aucune"}</option>'
+            for value in PHOTOPLUS_VALUES
+        )
+        suppliers = "".join(
+            f'<option value="{value}"{" selected" if value == product["supplier"] else ""}>{label}</option>'
+            for value, label in [("", "")] + list(SUPPLIERS.items())
+        )
+        group_options = "".join(
+            f'<option value="{group_id}">{html.escape(group["name"])}</option>' for group_id, group in groups.items()
+        )
+        attached = "".join(
+            f'<tr><td>{html.escape(groups[group_id]["name"])}</td></tr>' for group_id in sorted(product["groups"]) if group_id in groups
+        )
+        action = f"SA_prod_edit.asp?recid={product_id}&amp;action="
+        self.send_html(page(
+            f'<h1>{html.escape(product["ref"])}</h1>'
+            f'<form method="post" action="{action}photo"><input type="text" name="ref" value="{html.escape(product["ref"])}">'
+            f'<select name="photoplus">{photoplus}</select></form>'
+            f'<form method="post" action="{action}fournisseur"><div>Fournisseurs</div>'
+            f'<select name="idf1">{suppliers}</select><button type="submit">Mettre à jour</button></form>'
+            f'<table><tr><td><form method="post" action="{action}groupe">'
+            f'<select id="idOptionGroup" name="idOptionGroup">{group_options}</select>'
+            f'<button type="submit" style="{ADD_GROUP_STYLE}">Ajouter</button></form></td></tr>{attached}</table>'
+            f'<form method="post" action="{action}description" onsubmit="{EDITOR_SUBMIT_JS}">'
+            f'<iframe id="idContentoEdit2" src="/admin/editor_frame.asp?recid={product_id}"></iframe>'
+            '<textarea id="descl" name="descl" style="display:none"></textarea>'
+            f'<button type="submit" style="{UPDATE_DESCRIPTION_STYLE}">Mettre à jour</button></form>'
+        ))
+
+    def post_admin_SA_prod_edit(self, query):
+        product_id = int(query.get("recid", 0))
+        form = self.form()
+        with self.state.lock:
+            product = self.state.products.get(product_id)
+            if product is not None:
+                if query.get("action") == "fournisseur":
+                    product["supplier"] = form.get("idf1", "")
+                elif query.get("action") == "groupe" and form.get("idOptionGroup", "").isdigit():
+                    product["groups"].add(int(form["idOptionGroup"]))
+                elif query.get("action") == "description":
+                    product["description"] = form.get("descl", "")
+        self.redirect(f"/admin/SA_prod_edit.asp?action=edit&recid={product_id}")
+
+    def get_admin_editor_frame(self, query):
+        with self.state.lock:
+            product = self.state.products.get(int(query.get("recid", 0)))
+            description = product["description"] if product else ""
+        self.send_html(f'<html><body contenteditable="true">{description}</body></html>')
+
+    def get_public_product(self, path):
+        match = re.search(r"p(\d+)\.aspx$", path)
+        with self.state.lock:
+            product = self.state.products.get(int(match.group(1))) if match else None
+            product = dict(product) if product else None
+        if product is None:
+            self.send_html("<html><body><p>Produit introuvable</p></body></html>", status=404)
+            return
+        self.send_html(
+            "<html><body>"
+            f'<h1 id="description">{html.escape(product["marque"])} {html.escape(product["ref"])}</h1>'
+            f'<div id="sku">Ref : {html.escape(product["ref"])}</div>'
+            '<h2 id="descl">Puissance : 2 kW<br>Dimensions : 400 x 600 mm<br>Poids : 12 kg</h2>'
+            "</body></html>"
+        )
+
+
+class MockAdminServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, expire_rate=0.0, seed=None):
+        self.httpd = ThreadingHTTPServer((host, port), MockAdminHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = MockAdminState(latency, jitter, error_rate, expire_rate, seed)
+        self.thread = None
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Restoconcept admin")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra delay, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--expire-rate", type=float, default=0.0, help="Fraction of requests that expire the session")
+    parser.add_argument("--products", type=int, default=200, help="Products to create in the catalog")
+    args = parser.parse_args()
+
+    server = MockAdminServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.expire_rate)
+    server.state.add_products(args.products)
+    server.state.add_options(f"Option {i:04d}" for i in range(1, 51))
+    server.state.add_group("Groupe démo")
+    print(f"Mock admin listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+End-to-end throughput suite: runs every admin worker against the local mock
+admin server and reports ops/sec, p50/p95 latency of the worker's main step
+and the peak memory of the run (Python plus the Chromium processes).
+
+    python benchmarks/run_benchmarks.py --ops 50 --latency 0.05 --error-rate 0.01
+    python benchmarks/run_benchmarks.py --only supplier descriptions
+
+Each worker's step method is wrapped with a timer, so the numbers measure
+the same unit of work the tools log: one option row, one option added to a
+group, one product attached to a group, one supplier or description update.
+"""
+import argparse
+import asyncio
+import importlib.util
+import inspect
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "GUI"))
+
+from mock_admin_server import MockAdminServer
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def load_script(filename, module_name):
+    """
+    Import a root script whose file name is not a valid module name.
+    """
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StepRecorder:
+    """
+    Wrap a worker's step method to time every call and count the failures.
+    """
+
+    def __init__(self):
+        self.durations = []
+        self.errors = 0
+
+    def wrap(self, obj, name):
+        method = getattr(obj, name)
+
+        if inspect.iscoroutinefunction(method):
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                except Exception:
+                    self.errors += 1
+                    raise
+                finally:
+                    self.durations.append(time.perf_counter() - start)
+        else:
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                except Exception:
+                    self.errors += 1
+                    raise
+                finally:
+                    self.durations.append(time.perf_counter() - start)
+
+        setattr(obj, name, timed)
+
+    def percentile(self, fraction):
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class PeakMemory:
+    """
+    Sample the resident memory of this process and its children (Chromium)
+    in a background thread. Without psutil, fall back to the max RSS that
+    the kernel reports for this process and its reaped children.
+    """
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        process = psutil.Process()
+        while not self._stop.is_set():
+            total = 0
+            for proc in [process] + process.children(recursive=True):
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    pass
+            self.peak = max(self.peak, total)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if psutil is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        else:
+            import resource
+
+            # ru_maxrss is in kilobytes on Linux.
+            self.peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                         + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * 1024
+
+
+def bench_options_upload(server, tmp, ops):
+    from OptionsUploaderGUI import OptionsUploaderThread
+    from bench_options_upload import write_sheet
+
+    excel_file = os.path.join(tmp, "options.xlsx")
+    write_sheet(excel_file, ops, "suite")
+    worker = OptionsUploaderThread(excel_file, "bench", "bench", True)
+    worker.base_url = server.url
+    recorder = StepRecorder()
+    recorder.wrap(worker, "process_row")
+    worker.error_occurred.connect(lambda message: setattr(recorder, "errors", recorder.errors + 1))
+    worker.run()
+    return recorder
+
+
+def bench_option_groups(server, tmp, ops):
+    from RestoConcept_Option_ManagerGUI import PlaywrightWorker
+
+    names = [f"Option suite {i:04d}" for i in range(ops)]
+    server.state.add_options(names)
+    server.state.add_group("Groupe suite")
+    worker = PlaywrightWorker("bench", "bench", "Groupe suite", names, True)
+    worker.base_url = server.url
+    recorder = StepRecorder()
+    recorder.wrap(worker, "add_option_to_group")
+    worker.error_occurred.connect(lambda message: setattr(recorder, "errors", recorder.errors + 1))
+    worker.run()
+    return recorder
+
+
+def bench_group_assign(server, tmp, ops):
+    from Add_Group_to_ProductGUI import AutomationWorker
+
+    server.state.add_group("Groupe produits")
+    product_ids = [str(product_id) for product_id in server.state.add_products(ops)]
+    worker = AutomationWorker("bench", "bench", product_ids, "Groupe produits", True)
+    worker.base_url = server.url
+    recorder = StepRecorder()
+    recorder.wrap(worker, "add_product_to_group")
+    worker.run()
+    return recorder
+
+
+def bench_supplier(server, tmp, ops):
+    module = load_script("Add fournisseur.py", "add_fournisseur")
+
+    server.state.add_products(ops, brands=("Marque suite",))
+    excel_file = os.path.join(tmp, "fournisseurs.xlsx")
+    pd.DataFrame({"marque": ["Marque suite"], "fournisseur": ["2"]}).to_excel(excel_file, index=False)
+    admin = module.RestoconceptAdmin("bench", "bench", excel_file)
+    admin.base_url = server.url
+    recorder = StepRecorder()
+    recorder.wrap(admin, "process_produit")
+    asyncio.run(admin.run())
+    return recorder
+
+
+def bench_descriptions(server, tmp, ops):
+    module = load_script("description longue to products.py", "description_longue")
+
+    product_ids = server.state.add_products(ops)
+    excel_file = os.path.join(tmp, "descriptions.xlsx")
+    pd.DataFrame({
+        "Product ID": product_ids,
+        "SEO-Optimized Description": [f"<p>Description SEO {product_id}</p>" for product_id in product_ids],
+    }).to_excel(excel_file, index=False)
+    admin = module.RestoconceptAdmin("bench", "bench", excel_file)
+    admin.base_url = server.url
+    admin.headless = True
+    recorder = StepRecorder()
+    recorder.wrap(admin, "edit_product")
+    asyncio.run(admin.run())
+    return recorder
+
+
+BENCHMARKS = {
+    "options-upload": bench_options_upload,
+    "option-groups": bench_option_groups,
+    "group-assign": bench_group_assign,
+    "supplier": bench_supplier,
+    "descriptions": bench_descriptions,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=50, help="Units of work per benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every mock response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra delay per response, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock responses that are HTTP 500")
+    parser.add_argument("--expire-rate", type=float, default=0.0, help="Fraction of mock requests that expire the session")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    args = parser.parse_args()
+
+    from PyQt5.QtCore import QCoreApplication
+
+    app = QCoreApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep sessions, journals, caches and failed_products.txt of benchmark runs away from the user's.
+        os.environ["RESTOCONCEPT_SESSION_DIR"] = os.path.join(tmp, "sessions")
+        os.environ["RESTOCONCEPT_JOURNAL"] = os.path.join(tmp, "journal.sqlite3")
+        os.environ["RESTOCONCEPT_CATALOG"] = os.path.join(tmp, "catalog.sqlite3")
+        os.environ["RESTOCONCEPT_GROUP_CACHE"] = os.path.join(tmp, "option_groups.json")
+        os.chdir(tmp)
+
+        print(f"{args.ops} ops per benchmark, latency {args.latency * 1000:.0f} ms, "
+              f"error rate {args.error_rate:.1%}, expire rate {args.expire_rate:.1%}")
+        print(f"{'benchmark':<16} {'ops':>5} {'seconds':>8} {'ops/s':>7} {'p50 ms':>7} {'p95 ms':>7} "
+              f"{'peak MB':>8} {'errors':>7} {'500s':>5}")
+        for name in args.only:
+            with MockAdminServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                 expire_rate=args.expire_rate, seed=0) as server, PeakMemory() as memory:
+                start = time.perf_counter()
+                recorder = BENCHMARKS[name](server, tmp, args.ops)
+                elapsed = time.perf_counter() - start
+            count = len(recorder.durations)
+            print(f"{name:<16} {count:>5} {elapsed:>8.1f} {count / elapsed:>7.2f} "
+                  f"{recorder.percentile(0.5) * 1000:>7.0f} {recorder.percentile(0.95) * 1000:>7.0f} "
+                  f"{memory.peak / 1_000_000:>8.0f} {recorder.errors:>7} {server.state.errors_injected:>5}")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
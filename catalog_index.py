@@ -0,0 +1,322 @@
+"""
+Local index of the admin product catalog.
+
+One crawl of SA_prod.asp and the product edit pages fills a SQLite table
+with the id, ref, brand, supplier (idf1) and photoplus value of every
+product. Later refreshes re-read the listings, which are cheap, and only
+fetch the edit pages of products that are new or were read more than
+``max_age`` ago. Two timestamps are kept per product: ``last_seen`` when it
+last appeared in a listing and ``last_read`` when its edit page was last
+read; staleness is always judged on ``last_read``. A brand is stored as its
+``marque`` option value with the option label next to it, and brand lookups
+match either. The tools query the index
+to resolve their targets, e.g. every product of a brand without a given
+supplier, instead of crawling each time.
+
+    python catalog_index.py refresh --username admin --max-age 86400
+    python catalog_index.py query --brand "Marque A" --without-supplier 2
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from admin_listing import DEFAULT_CONCURRENCY, crawl_listing
+
+DEFAULT_CATALOG_PATH = Path.home() / ".restoconcept" / "catalog.sqlite3"
+EDIT_PATH = "/admin/SA_prod_edit.asp?action=edit&recid="
+
+Product = namedtuple("Product", "id ref brand supplier photoplus last_seen last_read brand_label")
+
+
+def product_id_from_url(url):
+    """
+    Return the recid of a product edit URL as an int, or None.
+    """
+    recid = parse_qs(urlparse(url).query).get("recid")
+    return int(recid[0]) if recid and recid[0].isdigit() else None
+
+
+class CatalogIndex:
+    def __init__(self, path=None):
+        """
+        :param path: SQLite file, defaults to $RESTOCONCEPT_CATALOG or ~/.restoconcept/catalog.sqlite3
+        """
+        self.path = Path(path or os.environ.get("RESTOCONCEPT_CATALOG") or DEFAULT_CATALOG_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS products ("
+            " id INTEGER PRIMARY KEY, ref TEXT, brand TEXT, supplier TEXT, photoplus TEXT,"
+            " last_seen REAL NOT NULL, last_read REAL, brand_label TEXT)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(products)")]
+        if "last_read" not in columns:
+            # Indexes from before last_read: every product is re-read by the next refresh.
+            self._conn.execute("ALTER TABLE products ADD COLUMN last_read REAL")
+        if "brand_label" not in columns:
+            # Filled in by the next refresh of each brand
+            self._conn.execute("ALTER TABLE products ADD COLUMN brand_label TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS products_brand ON products (brand)")
+
+    def upsert(self, products):
+        """
+        Insert or replace products read from their edit page, given as dicts
+        with the Product fields; last_seen and last_read default to now.
+        """
+        now = time.time()
+        rows = [
+            (p["id"], p.get("ref"), p.get("brand"), p.get("supplier"), p.get("photoplus"),
+             p.get("last_seen", now), p.get("last_read", now), p.get("brand_label"))
+            for p in products
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO products"
+                " (id, ref, brand, supplier, photoplus, last_seen, last_read, brand_label)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute("COMMIT")
+
+    def update(self, product_id, **fields):
+        """
+        Record a change a tool just made, e.g. update(123, supplier="2").
+        The timestamps are left alone: the other fields were not re-read.
+        """
+        columns = [name for name in fields if name in ("ref", "brand", "supplier", "photoplus")]
+        if not columns:
+            return
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE products SET {assignments} WHERE id = ?",
+                [fields[name] for name in columns] + [product_id],
+            )
+
+    def touch(self, product_ids, brand_label=None):
+        """
+        Mark products as seen in a listing without re-reading their edit page; last_read is kept.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE products SET last_seen = ?, brand_label = COALESCE(?, brand_label) WHERE id = ?",
+                [(now, brand_label, i) for i in product_ids],
+            )
+            self._conn.execute("COMMIT")
+
+    def query(self, brand=None, supplier=None, without_supplier=None, without_photoplus=None, max_age=None):
+        """
+        Return the matching products as Product tuples, ordered by id.
+
+        :param brand: marque option value or label
+
+        :param max_age: Ignore products whose edit page was not read for this many seconds
+        """
+        clauses, params = [], []
+        if brand is not None:
+            clauses.append("(brand = ? OR brand_label = ?)")
+            params.extend((brand, brand))
+        if supplier is not None:
+            clauses.append("supplier = ?")
+            params.append(supplier)
+        if without_supplier is not None:
+            clauses.append("COALESCE(supplier, '') != ?")
+            params.append(without_supplier)
+        if without_photoplus is not None:
+            clauses.append("COALESCE(photoplus, '') != ?")
+            params.append(without_photoplus)
+        if max_age is not None:
+            clauses.append("last_read >= ?")
+            params.append(time.time() - max_age)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT * FROM products{where} ORDER BY id", params).fetchall()
+        return [Product._make(row) for row in rows]
+
+    def brands(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT COALESCE(brand_label, brand) AS name FROM products WHERE brand IS NOT NULL ORDER BY name"
+            )]
+
+    def brand_is_fresh(self, brand, max_age):
+        """
+        True when the brand's listing (option value or label) was crawled in the last max_age
+        seconds and every product it listed then had its edit page read within max_age too.
+        """
+        limit = time.time() - max_age
+        with self._lock:
+            listed, stale = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(last_read IS NULL OR last_read < ?), 0)"
+                " FROM products WHERE (brand = ? OR brand_label = ?) AND last_seen >= ?",
+                (limit, brand, brand, limit),
+            ).fetchone()
+        return listed > 0 and stale == 0
+
+    def stale_ids(self, product_ids, max_age=None):
+        """
+        Return the ids that are not indexed yet, were never read, or were last read more than max_age seconds ago.
+        """
+        with self._lock:
+            read = dict(self._conn.execute("SELECT id, last_read FROM products"))
+        limit = time.time() - max_age if max_age is not None else None
+        return [
+            i for i in product_ids
+            if read.get(i) is None or (limit is not None and read[i] < limit)
+        ]
+
+    def edit_urls(self, base_url, products):
+        return [f"{base_url}{EDIT_PATH}{product.id}" for product in products]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _EditPageParser(HTMLParser):
+    """
+    Read the ref input and the selected photoplus and idf1 values of a product edit page.
+    """
+
+    SELECTS = ("photoplus", "idf1")
+
+    def __init__(self):
+        super().__init__()
+        self.values = {}
+        self._select = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "input" and attrs.get("name") == "ref":
+            self.values.setdefault("ref", attrs.get("value") or "")
+        elif tag == "select":
+            self._select = attrs.get("name") if attrs.get("name") in self.SELECTS else None
+        elif tag == "option" and self._select:
+            value = attrs.get("value") or ""
+            # Without a selected option the browser shows the first one.
+            if "selected" in attrs or self._select not in self.values:
+                self.values[self._select] = value
+
+    def handle_endtag(self, tag):
+        if tag == "select":
+            self._select = None
+
+
+def parse_edit_page(html):
+    parser = _EditPageParser()
+    parser.feed(html)
+    return {"ref": parser.values.get("ref"), "supplier": parser.values.get("idf1"),
+            "photoplus": parser.values.get("photoplus")}
+
+
+async def _brand_links(page, base_url, brand, concurrency):
+    await page.goto(f"{base_url}/admin/SA_prod.asp", wait_until="domcontentloaded")
+    await page.select_option('select[name="marque"]', brand)
+    async with page.expect_navigation(wait_until="domcontentloaded"):
+        await page.click('button:has-text("Rechercher")')
+    return await crawl_listing(page.context.request, page.url, await page.content(), concurrency)
+
+
+async def crawl_catalog(page, catalog, base_url, brands=None, max_age=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Crawl the listings of every brand (or of `brands`) into the index.
+
+    :param page: Logged-in async Playwright page
+    :param brands: marque option values or labels
+    :param max_age: Re-read edit pages last read more than this many seconds ago; None reads only new products
+    :return: Number of edit pages read
+    """
+    await page.goto(f"{base_url}/admin/SA_prod.asp", wait_until="domcontentloaded")
+    options = await page.locator('select[name="marque"] option').evaluate_all(
+        "options => options.map(o => [o.value, o.textContent.trim()])"
+    )
+    labels = {value: label for value, label in options if value.strip()}
+    if brands is not None:
+        by_label = {label: value for value, label in labels.items()}
+        brands = [brand if brand in labels else by_label.get(brand, brand) for brand in brands]
+    else:
+        brands = list(labels)
+
+    request = page.context.request
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def read_product(url, brand):
+        async with semaphore:
+            response = await request.get(url)
+            return dict(parse_edit_page(await response.text()), id=product_id_from_url(url), brand=brand,
+                        brand_label=labels.get(brand))
+
+    read = 0
+    for brand in brands:
+        urls = {product_id_from_url(url): url for url in await _brand_links(page, base_url, brand, concurrency)}
+        urls.pop(None, None)
+        stale = set(catalog.stale_ids(list(urls), max_age))
+        catalog.touch([i for i in urls if i not in stale], labels.get(brand))
+        products = await asyncio.gather(*(read_product(urls[i], brand) for i in sorted(stale)))
+        catalog.upsert(products)
+        read += len(products)
+    return read
+
+
+async def refresh(username, base_url, brands=None, max_age=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Refresh the index with the session a tool saved for `username`.
+    """
+    from playwright.async_api import async_playwright
+
+    from context_factory import async_new_context
+    from session_store import SessionStore, async_session_is_valid
+
+    catalog = CatalogIndex()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            context, _ = await async_new_context(
+                browser, base_url=base_url, storage_state=SessionStore().load(username, base_url)
+            )
+            if not await async_session_is_valid(context, base_url):
+                raise SystemExit(f"No valid saved session for {username}: log in with one of the tools first.")
+            read = await crawl_catalog(await context.new_page(), catalog, base_url, brands, max_age, concurrency)
+            print(f"Read {read} product pages into {catalog.path}")
+        finally:
+            await browser.close()
+            catalog.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    refresh_parser = commands.add_parser("refresh", help="Crawl the admin into the index")
+    refresh_parser.add_argument("--username", required=True, help="Account whose saved session is used")
+    refresh_parser.add_argument("--base-url", default="https://www.restoconcept.com")
+    refresh_parser.add_argument("--brand", action="append", help="Only crawl this brand (repeatable)")
+    refresh_parser.add_argument("--max-age", type=float, help="Re-read products last read more than this many seconds ago")
+    refresh_parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    query_parser = commands.add_parser("query", help="List indexed products")
+    query_parser.add_argument("--brand")
+    query_parser.add_argument("--supplier")
+    query_parser.add_argument("--without-supplier")
+    args = parser.parse_args()
+
+    if args.command == "refresh":
+        asyncio.run(refresh(args.username, args.base_url, args.brand, args.max_age, args.concurrency))
+    else:
+        catalog = CatalogIndex()
+        for product in catalog.query(args.brand, args.supplier, args.without_supplier):
+            print(f"{product.id}\t{product.ref}\t{product.brand}\t{product.supplier}\t{product.photoplus}")
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Browser context factory with named resource-blocking profiles.
+
+Every tool opens its Playwright contexts through ``new_context`` (sync API)
+or ``async_new_context`` (async API). The profile decides which resource
+types and domains are aborted before they hit the network; ``BlockingStats``
+counts what was dropped so each run can report the requests and (estimated)
+bytes it saved.
+
+Note that routing disables Chromium's HTTP cache for the context, which is
+why the admin profile keeps stylesheets and scripts: pages rely on them for
+layout and visibility checks.
+"""
+import os
+import threading
+from urllib.parse import urlparse
+
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "bing.com",
+)
+
+PROFILES = {
+    # No interception at all.
+    "none": {"resource_types": (), "domains": (), "third_party_scripts": True},
+    # Admin pages: we never look at pictures, fonts or trackers.
+    "admin": {"resource_types": ("image", "media", "font"), "domains": TRACKER_DOMAINS, "third_party_scripts": True},
+    # Public product pages read for their text only.
+    "scrape": {
+        "resource_types": ("image", "media", "font", "stylesheet"),
+        "domains": TRACKER_DOMAINS,
+        "third_party_scripts": False,
+    },
+}
+
+DEFAULT_PROFILE = os.environ.get("RESTOCONCEPT_RESOURCE_PROFILE", "admin")
+
+# Typical transfer sizes used to estimate the bytes a blocked request would have cost.
+ESTIMATED_BYTES = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 60_000,
+    "stylesheet": 25_000,
+    "script": 60_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+class BlockingStats:
+    def __init__(self, profile):
+        self.profile = profile
+        self.blocked = {}
+        self._lock = threading.Lock()
+
+    def add(self, resource_type):
+        with self._lock:
+            self.blocked[resource_type] = self.blocked.get(resource_type, 0) + 1
+
+    @property
+    def requests_saved(self):
+        return sum(self.blocked.values())
+
+    @property
+    def bytes_saved(self):
+        return sum(ESTIMATED_BYTES.get(kind, DEFAULT_ESTIMATED_BYTES) * count for kind, count in self.blocked.items())
+
+    def summary(self):
+        details = ", ".join(f"{kind} {count}" for kind, count in sorted(self.blocked.items()))
+        return (
+            f"Resource profile '{self.profile}': blocked {self.requests_saved} requests, "
+            f"~{self.bytes_saved / 1_000_000:.1f} MB saved" + (f" ({details})" if details else "")
+        )
+
+
+def _host_matches(host, domains):
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+def should_block(rules, url, resource_type, first_party=None):
+    if resource_type in rules["resource_types"]:
+        return True
+    host = urlparse(url).hostname or ""
+    if _host_matches(host, rules["domains"]):
+        return True
+    if not rules["third_party_scripts"] and resource_type == "script" and first_party:
+        return not _host_matches(host, (first_party,))
+    return False
+
+
+def _first_party(base_url):
+    host = urlparse(base_url).hostname if base_url else None
+    # www.restoconcept.com and static.restoconcept.com are both first party.
+    return host[4:] if host and host.startswith("www.") else host
+
+
+def new_context(browser, profile=None, stats=None, base_url=None, **context_args):
+    """
+    Open a context on a sync Playwright browser with the profile's routes.
+
+    :param stats: BlockingStats to add to, e.g. one shared by several contexts
+    :param base_url: Site being automated; decides what counts as third party
+    :return: (context, stats)
+    """
+    profile = profile or DEFAULT_PROFILE
+    rules = PROFILES[profile]
+    stats = stats or BlockingStats(profile)
+    first_party = _first_party(base_url)
+    context = browser.new_context(**context_args)
+
+    if profile != "none":
+        def handle(route):
+            request = route.request
+            if should_block(rules, request.url, request.resource_type, first_party):
+                stats.add(request.resource_type)
+                route.abort()
+            else:
+                route.continue_()
+
+        context.route("**/*", handle)
+    return context, stats
+
+
+async def async_new_context(browser, profile=None, stats=None, base_url=None, **context_args):
+    """
+    Async counterpart of ``new_context`` for ``async_playwright`` browsers.
+    """
+    profile = profile or DEFAULT_PROFILE
+    rules = PROFILES[profile]
+    stats = stats or BlockingStats(profile)
+    first_party = _first_party(base_url)
+    context = await browser.new_context(**context_args)
+
+    if profile != "none":
+        async def handle(route):
+            request = route.request
+            if should_block(rules, request.url, request.resource_type, first_party):
+                stats.add(request.resource_type)
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await context.route("**/*", handle)
+    return context, stats
@@ -6,16 +6,85 @@ import pandas as pd
 from tkinter import Tk
 from tkinter.filedialog import askopenfilename
 import asyncio
+import hashlib
+import os
+import re
+
+from job_journal import JobJournal, STATUS_DONE, STATUS_FAILED, input_hash
+from context_factory import async_new_context
+from session_store import SessionStore, async_session_is_valid
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BASE_URL = "https://www.restoconcept.com"
+DEFAULT_CONCURRENCY = 4
+EDITOR_BODY = 'body[contenteditable="true"]'
+# Form fields the editor copies its HTML into when the form is submitted
+DESCRIPTION_FIELDS = ("descl",)
+UPDATE_BUTTON = 'button[style="font-family:arial; font-size:15px; cursor:pointer; background-color:#005c99; color:#fff; border:0; border-radius:3px; padding:3px 14px;"]'
+
+# Writes the description as markup in one call and lets the editor know its content changed.
+SET_EDITOR_HTML_JS = """
+(html) => {
+    document.body.innerHTML = html;
+    document.body.dispatchEvent(new Event('input', { bubbles: true }));
+}
+"""
+
+# The browser's own serialisation of some markup (entities, attribute quotes, void tags),
+# comparable with what the editor shows.
+SERIALIZE_HTML_JS = """
+(html) => {
+    const template = document.createElement('template');
+    template.innerHTML = html;
+    return template.innerHTML;
+}
+"""
+
+# Fills the form field backing the editor, for forms that do not copy the iframe on submit.
+SET_BACKING_FIELDS_JS = """
+({ html, names }) => {
+    const form = document.querySelector('iframe#idContentoEdit2').closest('form');
+    if (!form) return 0;
+    const fields = names.flatMap(name => Array.from(form.querySelectorAll(`[name="${name}"]`)));
+    fields.forEach(field => { field.value = html; });
+    return fields.length;
+}
+"""
+
+def description_hash(html: str) -> str:
+    """
+    Hash of a description that ignores formatting the editor may change:
+    whitespace runs, whitespace between tags, <br/> spellings and letter case of tags.
+    """
+    text = re.sub(r"\s+", " ", html).strip()
+    text = re.sub(r">\s+<", "><", text)
+    text = re.sub(r"<br\s*/?>", "<br>", text, flags=re.IGNORECASE)
+    text = re.sub(r"</?[A-Za-z][A-Za-z0-9]*", lambda m: m.group(0).lower(), text)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
 class RestoconceptAdmin:
-    def __init__(self, username: str, password: str, excel_file: str):
+    def __init__(self, username: str, password: str, excel_file: str, concurrency: int = DEFAULT_CONCURRENCY):
         self.username = username
         self.password = password
         self.excel_file = excel_file
+        self.concurrency = max(1, concurrency)
+        self.counts = {"updated": 0, "unchanged": 0, "failed": 0, "journaled": 0}
+        self.base_url = BASE_URL
+        self.session_store = SessionStore()
+        self.resource_profile = None
+        self.headless = False
+
+    async def ensure_login(self, page: Page) -> None:
+        """
+        Reuse the saved session when it is still valid, otherwise log in.
+        """
+        if await async_session_is_valid(page.context, self.base_url):
+            logger.info("Reusing saved session")
+            return
+        await self.login(page)
 
     async def login(self, page: Page) -> None:
         """
@@ -23,7 +92,7 @@ class RestoconceptAdmin:
         """
         try:
             # Navigate to login page
-            await page.goto("https://www.restoconcept.com/admin/logon.asp", wait_until="networkidle")
+            await page.goto(f"{self.base_url}/admin/logon.asp", wait_until="networkidle")
             await page.fill("#adminuser", self.username)
             await page.fill("#adminPass", self.password)
             
@@ -39,42 +108,96 @@ class RestoconceptAdmin:
             for selector in success_selectors:
                 if await page.is_visible(selector):
                     logger.info("Login successful")
+                    self.session_store.save(self.username, self.base_url, await page.context.storage_state())
                     return
             
             raise Exception("Login verification failed")
         
         except Exception as e:
             logger.error(f"Login failed: {str(e)}")
+            self.session_store.clear(self.username, self.base_url)
             raise
 
-    async def edit_product(self, page: Page, product_id: str, description: str) -> None:
+    async def edit_product(self, page: Page, product_id: str, description: str) -> bool:
         """
         Edit a product by updating its description.
+        Returns False without writing when the stored description already matches.
         """
         try:
-            # Navigate to product edit page
-            url = f"https://www.restoconcept.com/admin/SA_prod_edit.asp?action=edit&recid={product_id}"
-            await page.goto(url, wait_until="networkidle")
+            # Navigate to product edit page and read the stored description
+            url = f"{self.base_url}/admin/SA_prod_edit.asp?action=edit&recid={product_id}"
+            iframe, current = await self.open_editor(page, url)
 
-            # Wait for iframe to load and switch context to iframe
-            iframe_element = await page.query_selector('iframe#idContentoEdit2')
-            iframe = await iframe_element.content_frame()
+            # Skip the write when the stored description is already the same, once the sheet's
+            # markup is written out the way the browser writes the stored one
+            submitted = await iframe.evaluate(SERIALIZE_HTML_JS, description)
+            if description_hash(current) == description_hash(submitted):
+                logger.info(f"Product {product_id} already has this description, skipping.")
+                return False
 
-            # Delete the content in the body
-            await iframe.fill('body[contenteditable="true"]', "")
+            # Replace the editor content as HTML in one call, whatever its length,
+            # and fill the backing form field with the same markup
+            await iframe.evaluate(SET_EDITOR_HTML_JS, description)
+            # The browser's serialisation of the markup is what the server should send back
+            expected = await iframe.inner_html(EDITOR_BODY)
+            await page.evaluate(SET_BACKING_FIELDS_JS, {"html": description, "names": list(DESCRIPTION_FIELDS)})
 
-            # Replace with new text
-            await iframe.fill('body[contenteditable="true"]', description)
+            # Click on the "Mettre à jour" button and wait until the form is saved
+            async with page.expect_response(lambda response: response.request.method == "POST") as response_info:
+                await page.click(UPDATE_BUTTON)
+            response = await response_info.value
+            # The edit page answers the POST with a redirect back to itself (302)
+            if response.status >= 400:
+                raise Exception(f"Saving returned HTTP {response.status}")
 
-            # Click on the "Mettre à jour" button
-            await page.click('button[style="font-family:arial; font-size:15px; cursor:pointer; background-color:#005c99; color:#fff; border:0; border-radius:3px; padding:3px 14px;"]')
+            # Confirm what the server stored
+            _, stored = await self.open_editor(page, url)
+            if description_hash(stored) != description_hash(expected):
+                raise Exception("Stored description differs from the submitted one")
 
             logger.info(f"Product {product_id} updated successfully.")
+            return True
         
         except Exception as e:
             logger.error(f"Error during product edit for ID {product_id}: {str(e)}")
             raise
 
+    async def open_editor(self, page: Page, url: str):
+        """
+        Load a product edit page and return (editor frame, its current HTML).
+        """
+        await page.goto(url, wait_until="domcontentloaded")
+        iframe_element = await page.wait_for_selector('iframe#idContentoEdit2')
+        iframe = await iframe_element.content_frame()
+        await iframe.wait_for_selector(EDITOR_BODY, state="attached")
+        return iframe, await iframe.inner_html(EDITOR_BODY)
+
+    async def edit_worker(self, context, queue: asyncio.Queue, journal: JobJournal) -> None:
+        """
+        Edit queued products on a page of its own until the queue is empty.
+        A failing product, or a crashed page, does not stop the worker.
+        """
+        page = await context.new_page()
+        try:
+            while True:
+                try:
+                    product_id, description, row_hash = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    if page.is_closed():
+                        page = await context.new_page()
+                    updated = await self.edit_product(page, product_id, description)
+                except Exception as e:
+                    self.counts["failed"] += 1
+                    journal.record(product_id, row_hash, STATUS_FAILED, str(e))
+                    continue
+                self.counts["updated" if updated else "unchanged"] += 1
+                journal.record(product_id, row_hash, STATUS_DONE)
+        finally:
+            if not page.is_closed():
+                await page.close()
+
     async def run(self) -> None:
         # Read Excel file to get product IDs and descriptions
         data = pd.read_excel(self.excel_file)
@@ -83,18 +206,41 @@ class RestoconceptAdmin:
             return
 
         async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=False)  # Change to True to run headless
-            page = await browser.new_page()
+            browser = await p.chromium.launch(headless=self.headless)
+            context, blocking_stats = await async_new_context(
+                browser, self.resource_profile, base_url=self.base_url,
+                storage_state=self.session_store.load(self.username, self.base_url)
+            )
+            page = await context.new_page()
 
             # Login to the admin panel
-            await self.login(page)
-
-            # Iterate over products and edit each
-            for _, row in data.iterrows():
-                product_id = str(row["Product ID"])
-                description = str(row["SEO-Optimized Description"])
-                logger.info(f"Updating product ID {product_id} with description: {description}")
-                await self.edit_product(page, product_id, description)
+            await self.ensure_login(page)
+
+            # Rows finished in a previous run with the same description are skipped
+            journal = JobJournal(f"descriptions:{os.path.abspath(self.excel_file)}")
+
+            # Queue the products still to edit; a pool of pages works through them
+            queue = asyncio.Queue()
+            for product_id, description in zip(data["Product ID"], data["SEO-Optimized Description"]):
+                product_id, description = str(product_id), str(description)
+                row_hash = input_hash(description)
+                if journal.is_done(product_id, row_hash):
+                    logger.info(f"Product ID {product_id} already updated in a previous run, skipping")
+                    self.counts["journaled"] += 1
+                    continue
+                queue.put_nowait((product_id, description, row_hash))
+            logger.info(f"{queue.qsize()} products to check with {self.concurrency} pages")
+
+            await asyncio.gather(*(self.edit_worker(context, queue, journal) for _ in range(self.concurrency)))
+
+            summary = journal.summary()
+            journal.close()
+            logger.info(
+                f"Products: {self.counts['updated']} updated, {self.counts['unchanged']} already up to date, "
+                f"{self.counts['journaled']} done in a previous run, {self.counts['failed']} failed"
+            )
+            logger.info(f"Journal: {summary.get(STATUS_DONE, 0)} done, {summary.get(STATUS_FAILED, 0)} failed")
+            logger.info(blocking_stats.summary())
 
             # Close the browser after the task
             await browser.close()
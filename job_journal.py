@@ -0,0 +1,87 @@
+"""
+Crash-safe journal of long upload runs.
+
+Every finished row is written to a local SQLite database as soon as it
+completes: its key, a hash of its input and its outcome. A restarted run of
+the same job skips the rows already done with the same input and only
+retries failures and rows whose input changed.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_JOURNAL_PATH = Path.home() / ".restoconcept" / "journal.sqlite3"
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def input_hash(*values):
+    payload = json.dumps(values, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class JobJournal:
+    def __init__(self, job, path=None):
+        """
+        :param job: Identifier of the run, e.g. "options-upload:/path/to/sheet.xlsx"
+        :param path: SQLite file, shared by all jobs
+        """
+        self.job = job
+        self.path = Path(path or os.environ.get("RESTOCONCEPT_JOURNAL") or DEFAULT_JOURNAL_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit: each row is durable as soon as record() returns.
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_rows ("
+            " job TEXT NOT NULL, row_key TEXT NOT NULL, input_hash TEXT NOT NULL,"
+            " status TEXT NOT NULL, message TEXT, attempts INTEGER NOT NULL DEFAULT 1,"
+            " updated_at REAL NOT NULL, PRIMARY KEY (job, row_key))"
+        )
+        self._done = dict(self._conn.execute(
+            "SELECT row_key, input_hash FROM job_rows WHERE job = ? AND status = ?", (job, STATUS_DONE)
+        ))
+
+    def is_done(self, key, row_hash):
+        return self._done.get(str(key)) == row_hash
+
+    def record(self, key, row_hash, status, message=""):
+        key = str(key)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job_rows (job, row_key, input_hash, status, message, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (job, row_key) DO UPDATE SET input_hash = excluded.input_hash,"
+                " status = excluded.status, message = excluded.message,"
+                " attempts = job_rows.attempts + 1, updated_at = excluded.updated_at",
+                (self.job, key, row_hash, status, message, time.time()),
+            )
+            if status == STATUS_DONE:
+                self._done[key] = row_hash
+            else:
+                self._done.pop(key, None)
+
+    def summary(self):
+        """
+        Count of journaled rows per status for this job.
+        """
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM job_rows WHERE job = ? GROUP BY status", (self.job,)
+            ))
+
+    def reset(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM job_rows WHERE job = ?", (self.job,))
+            self._done.clear()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
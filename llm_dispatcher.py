@@ -0,0 +1,137 @@
+"""
+Rate-limit-aware dispatcher for concurrent LLM calls.
+
+``LLMDispatcher`` wraps anything with an async ``ainvoke(prompt)`` (a
+LangChain chain, ``StubLLM``) and keeps several calls in flight while staying
+under a requests-per-minute and a tokens-per-minute budget. Both budgets are
+token buckets: a call waits until the request bucket has one request and the
+token bucket has its estimated token cost. The buckets start empty, so the
+first minute stays within one minute of budget instead of adding a full
+burst on top of the refill. The estimate is corrected with the
+actual prompt and answer sizes once the call returns. Rate-limit errors are
+retried with exponential backoff.
+"""
+import asyncio
+import random
+import time
+
+DEFAULT_RPM = 30
+DEFAULT_TPM = 30000
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_MAX_RETRIES = 5
+# Expected answer size used to reserve tokens before the call returns.
+DEFAULT_OUTPUT_TOKENS = 800
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def is_rate_limit_error(error):
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or "RateLimit" in type(error).__name__ or "rate limit" in str(error).lower()
+
+
+class TokenBucket:
+    def __init__(self, per_minute, capacity=None):
+        """
+        :param per_minute: Refill rate
+        :param capacity: Largest burst after an idle period, one minute of budget by default
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = 0.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount):
+        # A single call larger than the bucket would wait forever: cap it.
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                await asyncio.sleep((amount - self.level) / self.rate)
+
+    def adjust(self, amount):
+        """
+        Charge (positive) or refund (negative) tokens after the fact; the level may go negative.
+        """
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class LLMDispatcher:
+    def __init__(self, llm, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 max_retries=DEFAULT_MAX_RETRIES, base_delay=2.0, output_tokens=DEFAULT_OUTPUT_TOKENS):
+        """
+        :param llm: Object with an async ainvoke(prompt) returning text
+        :param rpm: Requests per minute allowed by the provider
+        :param tpm: Tokens per minute allowed by the provider
+        :param max_in_flight: Calls running at the same time
+        """
+        self.llm = llm
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.output_tokens = output_tokens
+        self._slots = asyncio.Semaphore(max(1, max_in_flight))
+        self.started = time.monotonic()
+        self.tokens_used = 0
+        self.calls = 0
+        self.retries = 0
+        self.waiting = 0
+        self.in_flight = 0
+
+    @property
+    def queue_depth(self):
+        return self.waiting
+
+    def tokens_per_second(self):
+        return self.tokens_used / max(time.monotonic() - self.started, 1e-9)
+
+    async def ainvoke(self, prompt):
+        reserved = estimate_tokens(prompt) + self.output_tokens
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                await self.requests.acquire(1)
+                await self.tokens.acquire(reserved)
+                self.in_flight += 1
+                try:
+                    answer = await self.llm.ainvoke(prompt)
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == self.max_retries:
+                        raise
+                    self.retries += 1
+                    await asyncio.sleep(self.base_delay * 2 ** attempt * (1 + random.random()))
+                    continue
+                finally:
+                    self.in_flight -= 1
+
+                used = estimate_tokens(prompt) + estimate_tokens(answer)
+                self.tokens.adjust(used - reserved)
+                self.tokens_used += used
+                self.calls += 1
+                return answer
+        finally:
+            self._slots.release()
+
+    def summary(self):
+        return (
+            f"LLM dispatcher: {self.calls} calls, ~{self.tokens_used} tokens, "
+            f"{self.tokens_per_second():.0f} tokens/s, {self.retries} rate-limit retries, queue depth {self.queue_depth}"
+        )
@@ -0,0 +1,164 @@
+"""
+Persistent cache of option group pages.
+
+Reaching a group's "Ajouter/retirer des options" page normally takes a
+search on optionsgroupslist.asp and a click on the group's icon. The URL of
+that page is stable, so it is cached per site and group name in a JSON file:
+filled from a bulk read of the groups list and on every lookup that had to
+search. Callers drop an entry when the cached page no longer shows the group
+(``page_shows_group``), e.g. after it was deleted or renamed.
+"""
+import json
+import os
+import threading
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin
+
+DEFAULT_CACHE_PATH = Path.home() / ".restoconcept" / "option_groups.json"
+GROUPS_LIST_PATH = "/admin/options/optionsgroupslist.asp"
+GROUP_ICON_ALT = "Ajouter/retirer des options"
+# Column headings of the groups list that name the group column
+NAME_HEADINGS = ("nom", "groupe", "libellé", "name")
+# True when a leaf element reads the group name, alone or after a "Label :" prefix
+SHOWS_GROUP_JS = """
+(key) => Array.from(document.body.querySelectorAll('*'))
+    .filter(element => !element.children.length)
+    .map(element => element.textContent.trim().split(/\\s+/).join(' ').toLowerCase())
+    .some(text => text === key || text.split(':').pop().trim() === key)
+"""
+
+
+def group_key(name):
+    return " ".join(name.split()).lower()
+
+
+class OptionGroupCache:
+    def __init__(self, path=None):
+        """
+        :param path: JSON file, defaults to $RESTOCONCEPT_GROUP_CACHE or ~/.restoconcept/option_groups.json
+        """
+        self.path = Path(path or os.environ.get("RESTOCONCEPT_GROUP_CACHE") or DEFAULT_CACHE_PATH)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._sites = json.load(f)
+        except (OSError, ValueError):
+            self._sites = {}
+
+    def get(self, base_url, name):
+        return self._sites.get(base_url, {}).get(group_key(name))
+
+    def has_site(self, base_url):
+        return bool(self._sites.get(base_url))
+
+    def set(self, base_url, name, url):
+        self.update(base_url, {name: url})
+
+    def update(self, base_url, urls):
+        """
+        Store several {group name: page URL} entries at once.
+        """
+        with self._lock:
+            site = self._sites.setdefault(base_url, {})
+            site.update({group_key(name): url for name, url in urls.items()})
+            self._save()
+
+    def discard(self, base_url, name):
+        with self._lock:
+            if self._sites.get(base_url, {}).pop(group_key(name), None) is not None:
+                self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._sites, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+class _GroupsListParser(HTMLParser):
+    """
+    Collect (group name, icon href) for every row of the groups list. The
+    name is read from the column headed like NAME_HEADINGS; without such a
+    heading, from the first cell that is not an id.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.groups = []
+        self._cells = None
+        self._heading_row = False
+        self._name_column = None
+        self._href = None
+        self._icon_href = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "tr":
+            self._cells, self._icon_href, self._heading_row = [], None, True
+        elif tag in ("td", "th") and self._cells is not None:
+            self._cells.append("")
+            self._heading_row = self._heading_row and tag == "th"
+        elif tag == "a":
+            self._href = attrs.get("href")
+        elif tag == "img" and self._href and GROUP_ICON_ALT in (attrs.get("alt") or ""):
+            self._icon_href = self._href
+
+    def handle_data(self, data):
+        if self._cells:
+            self._cells[-1] += data
+
+    def handle_endtag(self, tag):
+        if tag == "a":
+            self._href = None
+        elif tag == "tr" and self._cells is not None:
+            cells = [cell.strip() for cell in self._cells]
+            if self._heading_row and cells:
+                self._name_column = next(
+                    (i for i, cell in enumerate(cells) if any(h in cell.lower() for h in NAME_HEADINGS)), None
+                )
+            elif self._icon_href:
+                name = self._name(cells)
+                if name:
+                    self.groups.append((name, self._icon_href))
+            self._cells = None
+
+    def _name(self, cells):
+        if self._name_column is not None and self._name_column < len(cells):
+            return cells[self._name_column]
+        return next((cell for cell in cells if cell and not cell.isdigit()), None)
+
+
+def parse_groups_list(html, page_url):
+    """
+    Return {group name: absolute URL of its options page} from a groups list page.
+    """
+    parser = _GroupsListParser()
+    parser.feed(html)
+    return {name: urljoin(page_url, href) for name, href in parser.groups}
+
+
+def page_shows_group(page, name):
+    """
+    True when a sync Playwright page (a group's options page) displays the group name.
+    """
+    return bool(page.evaluate(SHOWS_GROUP_JS, group_key(name)))
+
+
+def crawl_option_groups(context, base_url, cache):
+    """
+    Read the whole groups list with one request sharing the context's session
+    and store every group page in the cache.
+
+    :param context: Sync Playwright BrowserContext
+    :return: Number of groups found
+    """
+    url = f"{base_url}{GROUPS_LIST_PATH}?psearch="
+    response = context.request.get(url)
+    if not response.ok:
+        return 0
+    groups = parse_groups_list(response.text(), response.url)
+    if groups:
+        cache.update(base_url, groups)
+    return len(groups)
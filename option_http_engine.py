@@ -0,0 +1,153 @@
+"""
+Browserless engine that creates options by posting the add form directly.
+
+The engine reuses the cookies of a Playwright login (its ``storage_state``)
+on a pooled ``requests`` session, so every submission is a single keep-alive
+POST instead of two page loads in Chromium.
+"""
+import threading
+from html.parser import HTMLParser
+from urllib.parse import urlencode, urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ADD_PATH = "/admin/SA_opt_edit.asp?action=add"
+OPTION_FIELDS = ("optionDescrip", "ref", "pricetoadd", "prixpublic", "iddelai")
+
+RESULT_EXISTS = "exists"
+RESULT_EXPIRED = "expired"
+RESULT_ADDED = "added"
+RESULT_UNEXPECTED = "unexpected"
+
+
+def classify_submission(text):
+    """
+    Map a response body to a result, checked in the same order as
+    OptionsUploaderThread.handle_submission_result.
+    """
+    if "Option déjà créée" in text:
+        return RESULT_EXISTS
+    if "Session expirée" in text:
+        return RESULT_EXPIRED
+    if "Option ajoutée avec succès" in text:
+        return RESULT_ADDED
+    return RESULT_UNEXPECTED
+
+
+class SessionExpired(Exception):
+    pass
+
+
+class _OptionFormParser(HTMLParser):
+    """
+    Collect the action, hidden inputs and submit button of the form that
+    contains the ``optionDescrip`` field.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.forms = []
+        self._form = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form":
+            self._form = {"action": attrs.get("action") or "", "fields": {}, "names": set(), "submit": None}
+            self.forms.append(self._form)
+        elif self._form is None or not attrs.get("name"):
+            return
+        elif tag in ("input", "select", "textarea"):
+            self._form["names"].add(attrs["name"])
+            if tag == "input" and (attrs.get("type") or "").lower() == "hidden":
+                self._form["fields"][attrs["name"]] = attrs.get("value") or ""
+        elif tag == "button" and (attrs.get("type") or "submit").lower() == "submit" and self._form["submit"] is None:
+            self._form["submit"] = (attrs["name"], attrs.get("value") or "")
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._form = None
+
+    def option_form(self):
+        for form in self.forms:
+            if "optionDescrip" in form["names"]:
+                return form
+        return None
+
+
+def _response_text(response):
+    # Classic ASP pages are often served as latin-1 without a charset header.
+    if "charset" not in response.headers.get("Content-Type", "").lower():
+        response.encoding = response.apparent_encoding
+    return response.text
+
+
+class HttpOptionEngine:
+    def __init__(self, base_url, storage_state, pool_size=8, timeout=30):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._form_lock = threading.Lock()
+        self._form = None
+        self.set_cookies(storage_state)
+
+    def set_cookies(self, storage_state):
+        """
+        Replace the session cookies with those of a Playwright storage state.
+        """
+        self.session.cookies.clear()
+        for cookie in storage_state.get("cookies", []):
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+
+    def load_form(self):
+        """
+        Fetch the add page once and remember where and how to post options.
+        """
+        response = self.session.get(f"{self.base_url}{ADD_PATH}", timeout=self.timeout)
+        text = _response_text(response)
+        if "logon.asp" in response.url or classify_submission(text) == RESULT_EXPIRED:
+            raise SessionExpired("Session expired while loading the option form.")
+
+        parser = _OptionFormParser()
+        parser.feed(text)
+        form = parser.option_form()
+        if form is None:
+            raise Exception("Option form not found on the add page.")
+
+        self._form = {
+            "url": urljoin(response.url, form["action"]),
+            "fields": form["fields"],
+            "submit": form["submit"],
+            "encoding": response.encoding or "utf-8",
+        }
+        return self._form
+
+    def submit_option(self, fields):
+        """
+        Post one option and return one of the RESULT_* constants.
+
+        :param fields: Mapping with the OPTION_FIELDS values as strings
+        """
+        with self._form_lock:
+            form = self._form or self.load_form()
+
+        data = dict(form["fields"])
+        if form["submit"]:
+            data[form["submit"][0]] = form["submit"][1]
+        data.update({name: fields.get(name, "") for name in OPTION_FIELDS})
+
+        response = self.session.post(
+            form["url"],
+            data=urlencode(data, encoding=form["encoding"], errors="xmlcharrefreplace"),
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            timeout=self.timeout,
+        )
+        if "logon.asp" in response.url:
+            return RESULT_EXPIRED
+        return classify_submission(_response_text(response))
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,157 @@
+"""
+Streaming ingestion of option sheets for the options uploader.
+
+Only the five option columns are read, in chunks: ``.xlsx`` files through
+openpyxl in read-only mode, CSV through pandas' chunked reader and Parquet
+batch by batch with pyarrow. Each chunk is normalised and validated in one
+vectorized pass and handed out as compact ``OptionRecord`` tuples.
+"""
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from option_http_engine import OPTION_FIELDS
+
+OptionRecord = namedtuple("OptionRecord", ("index",) + OPTION_FIELDS)
+
+REQUIRED_FIELDS = ("optionDescrip",)
+PRICE_FIELDS = ("pricetoadd", "prixpublic")
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class OptionSource:
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE, on_reject=None, on_skip=None):
+        """
+        :param path: .xlsx/.xlsm/.xls, .csv or .parquet file with the option columns
+        :param chunk_size: Rows normalised per vectorized pass
+        :param on_reject: Called with (index, reason) for every invalid row
+        :param on_skip: Called with the index of every blank row, which total counts too
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.on_reject = on_reject
+        self.on_skip = on_skip
+        self.extension = os.path.splitext(path)[1].lower()
+        self._total = None
+
+    @property
+    def total(self):
+        """
+        Number of data rows, read from file metadata where possible.
+        """
+        if self._total is None:
+            self._total = self._count_rows()
+        return self._total
+
+    def _count_rows(self):
+        if self.extension in (".xlsx", ".xlsm"):
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(self.path, read_only=True, data_only=True)
+            try:
+                max_row = workbook.active.max_row
+                if max_row is None:
+                    max_row = sum(1 for _ in workbook.active.iter_rows(values_only=True))
+                return max(max_row - 1, 0)
+            finally:
+                workbook.close()
+        if self.extension == ".csv":
+            with open(self.path, "rb") as f:
+                return max(sum(1 for _ in f) - 1, 0)
+        if self.extension == ".parquet":
+            import pyarrow.parquet as pq
+
+            return pq.ParquetFile(self.path).metadata.num_rows
+        return len(pd.read_excel(self.path, usecols=list(OPTION_FIELDS)))
+
+    def _chunks(self):
+        if self.extension in (".xlsx", ".xlsm"):
+            yield from self._xlsx_chunks()
+        elif self.extension == ".csv":
+            yield from pd.read_csv(self.path, usecols=list(OPTION_FIELDS), dtype=str, chunksize=self.chunk_size)
+        elif self.extension == ".parquet":
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(self.path).iter_batches(batch_size=self.chunk_size, columns=list(OPTION_FIELDS)):
+                yield batch.to_pandas()
+        else:
+            frame = pd.read_excel(self.path, usecols=list(OPTION_FIELDS))
+            for start in range(0, len(frame), self.chunk_size):
+                yield frame.iloc[start:start + self.chunk_size]
+
+    def _xlsx_chunks(self):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(value).strip() if value is not None else "" for value in next(rows, ())]
+            missing = [name for name in OPTION_FIELDS if name not in header]
+            if missing:
+                raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+            positions = [header.index(name) for name in OPTION_FIELDS]
+
+            chunk = []
+            for row in rows:
+                chunk.append(tuple(row[i] if i < len(row) else None for i in positions))
+                if len(chunk) == self.chunk_size:
+                    yield pd.DataFrame(chunk, columns=OPTION_FIELDS)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=OPTION_FIELDS)
+        finally:
+            workbook.close()
+
+    def __iter__(self):
+        start = 0
+        for frame in self._chunks():
+            frame = frame.reset_index(drop=True)
+            yield from self._records(frame, start)
+            start += len(frame)
+
+    def _records(self, frame, start):
+        text = normalize_frame(frame)
+        blank = (text == "").all(axis=1).to_numpy()
+        reasons = validate_frame(text)
+        invalid = reasons.notna().to_numpy() & ~blank
+        index = np.arange(start, start + len(frame))
+
+        if self.on_reject is not None:
+            for position in invalid.nonzero()[0]:
+                self.on_reject(int(index[position]), reasons.iat[position])
+        if self.on_skip is not None:
+            for position in blank.nonzero()[0]:
+                self.on_skip(int(index[position]))
+
+        keep = ~blank & ~invalid
+        columns = [index[keep].tolist()] + [text[name].to_numpy()[keep] for name in OPTION_FIELDS]
+        for values in zip(*columns):
+            yield OptionRecord._make(values)
+
+
+def normalize_frame(frame):
+    """
+    Turn the option columns into stripped strings, '' for empty cells.
+    Whole numbers read as floats (1.0) are written without the decimal part.
+    """
+    frame = frame.loc[:, list(OPTION_FIELDS)].astype(object)
+    text = frame.astype(str).mask(frame.isna(), "")
+    text = text.apply(lambda column: column.str.strip())
+    text["iddelai"] = text["iddelai"].str.replace(r"\.0+$", "", regex=True)
+    return text
+
+
+def validate_frame(text):
+    """
+    Return the rejection reason of every row, NA for valid rows.
+    """
+    reasons = pd.Series(pd.NA, index=text.index, dtype=object)
+    for name in PRICE_FIELDS:
+        values = text[name].str.replace(",", ".", regex=False)
+        invalid = (values != "") & pd.to_numeric(values, errors="coerce").isna()
+        reasons = reasons.mask(invalid & reasons.isna(), f"{name} is not a number")
+    for name in REQUIRED_FIELDS:
+        reasons = reasons.mask((text[name] == "") & reasons.isna(), f"{name} is empty")
+    return reasons
@@ -0,0 +1,270 @@
+"""
+Table extraction for the PDF to Excel Extractor, spread over processes.
+
+``page.extract_tables()`` is CPU-bound, so pages are split into small
+batches that a process pool extracts in parallel, each worker opening the
+PDF on its own. Results are handed back strictly in page order, one page at
+a time, so the caller can report progress per page and merge tables exactly
+as a serial run would. The workers live in this module, not in the Streamlit
+script, so they can be imported by spawned processes.
+
+``PageTableCache`` stores the tables of every extracted page on disk under a
+hash of the page's content streams, everything its resources reference
+(Form XObjects, fonts with their ToUnicode, Encoding and font file streams)
+and the extraction settings: a catalogue re-sent with a few changed pages
+only has those pages extracted again.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import pdfplumber
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+
+DEFAULT_BATCH_PAGES = 4
+# Batches submitted ahead per worker: a slow batch holds back at most this many results
+BATCHES_IN_FLIGHT_PER_WORKER = 2
+DEFAULT_CACHE_DIR = Path.home() / ".restoconcept" / "pdf_cache"
+DEFAULT_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def page_count(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pages(pdf_path, page_numbers, table_settings=None):
+    """
+    Extract the tables of some pages (0-based numbers) of a PDF file.
+
+    :return: [(page number, tables)] in the order of page_numbers
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        results = []
+        for page_num in page_numbers:
+            page = pdf.pages[page_num]
+            results.append((page_num, page.extract_tables(table_settings or {})))
+            # pdfplumber keeps parsed layout objects on the page: free them as we go.
+            page.close()
+        return results
+
+
+def _object_digest(obj, memo):
+    """
+    Hash a PDF object and everything it references, decoded streams included.
+    Indirect objects are hashed once per file: fonts and XObjects shared by
+    many pages cost nothing after the first page.
+    """
+    if isinstance(obj, PDFObjRef):
+        if obj.objid not in memo:
+            memo[obj.objid] = "cycle"  # a reference back to an object being hashed
+            memo[obj.objid] = _object_digest(resolve1(obj), memo)
+        return memo[obj.objid]
+
+    digest = hashlib.sha256()
+    if isinstance(obj, PDFStream):
+        digest.update(b"stream" + _object_digest(obj.attrs, memo).encode("ascii"))
+        # An image never changes the extracted tables: skip decoding its data
+        if getattr(obj.get("Subtype"), "name", None) != "Image":
+            digest.update(obj.get_data())
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=str):
+            if key != "Parent":
+                digest.update(f"/{key}:{_object_digest(obj[key], memo)}".encode("utf-8"))
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"[" + ",".join(_object_digest(item, memo) for item in obj).encode("ascii") + b"]")
+    else:
+        digest.update(repr(obj).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def page_hashes(pdf_path, page_numbers):
+    """
+    Hash what decides a page's tables: its decoded content streams, its
+    resources (fonts, Form XObjects and what they reference) and its geometry.
+    Much cheaper than extracting it.
+    """
+    hashes = {}
+    memo = {}
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num in page_numbers:
+            page = pdf.pages[page_num]
+            digest = hashlib.sha256()
+            digest.update(repr((page.page_obj.mediabox, page.rotation)).encode("ascii"))
+            digest.update(_object_digest(page.page_obj.resources or {}, memo).encode("ascii"))
+            contents = page.page_obj.contents or []
+            for stream in contents if isinstance(contents, list) else [contents]:
+                digest.update(resolve1(stream).get_data())
+            hashes[page_num] = digest.hexdigest()
+    return hashes
+
+
+class PageTableCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        """
+        :param directory: Defaults to $RESTOCONCEPT_PDF_CACHE or ~/.restoconcept/pdf_cache
+        :param max_bytes: Size the cache is trimmed to by evict(), least recently used first
+        """
+        self.directory = Path(directory or os.environ.get("RESTOCONCEPT_PDF_CACHE") or DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, page_hash, table_settings=None):
+        settings = json.dumps(table_settings or {}, sort_keys=True, default=str)
+        return hashlib.sha256(f"{page_hash}|{settings}|{pdfplumber.__version__}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                tables = json.load(f)
+            # Refresh the access time used by evict()
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return tables
+
+    def put(self, key, tables):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(tables, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """
+        Delete the least recently used pages until the cache fits in max_bytes.
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def summary(self):
+        return (
+            f"Page cache: {self.hits} pages reused, {self.misses} extracted, "
+            f"{self.size() / 1_000_000:.1f} MB on disk (limit {self.max_bytes / 1_000_000:.0f} MB)"
+        )
+
+
+def _batches(page_numbers, size):
+    return [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
+
+
+def iter_page_tables(pdf_path, page_numbers=None, workers=None, batch_pages=DEFAULT_BATCH_PAGES, table_settings=None,
+                     cache=None):
+    """
+    Yield (page number, tables) for the requested pages, in page order.
+
+    :param pdf_path: Path of the PDF file; workers open it themselves
+    :param page_numbers: 0-based pages to extract, all pages by default
+    :param workers: Processes to use, 1 extracts in this process
+    :param batch_pages: Pages sent to a worker at a time
+    :param cache: PageTableCache; only pages missing from it are extracted
+    """
+    if page_numbers is None:
+        page_numbers = range(page_count(pdf_path))
+    page_numbers = sorted(page_numbers)
+    workers = workers or default_workers()
+    if cache is None:
+        yield from _extract(pdf_path, page_numbers, workers, batch_pages, table_settings)
+        return
+
+    keys = {page_num: cache.key(page_hash, table_settings)
+            for page_num, page_hash in page_hashes(pdf_path, page_numbers).items()}
+    cached = {page_num: cache.get(key) for page_num, key in keys.items()}
+    missing = [page_num for page_num in page_numbers if cached[page_num] is None]
+    extracted = _extract(pdf_path, missing, workers, batch_pages, table_settings)
+    for page_num in page_numbers:
+        if cached[page_num] is not None:
+            yield page_num, cached[page_num]
+            continue
+        page_num, tables = next(extracted)
+        cache.put(keys[page_num], tables)
+        yield page_num, tables
+
+
+def _extract(pdf_path, page_numbers, workers, batch_pages, table_settings):
+    if workers == 1 or len(page_numbers) <= batch_pages:
+        for batch in _batches(page_numbers, batch_pages):
+            yield from extract_pages(pdf_path, batch, table_settings)
+        return
+
+    batches = iter(_batches(page_numbers, batch_pages))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(
+            pool.submit(extract_pages, pdf_path, batch, table_settings)
+            for batch in islice(batches, workers * BATCHES_IN_FLIGHT_PER_WORKER)
+        )
+        # Batches are consumed in submission order, which is page order. One more
+        # is submitted per batch consumed, so finished results never pile up.
+        while pending:
+            results = pending.popleft().result()
+            batch = next(batches, None)
+            if batch is not None:
+                pending.append(pool.submit(extract_pages, pdf_path, batch, table_settings))
+            yield from results
+
+
+def merge_product_tables(products, tables):
+    """
+    Add the tables of one page to the products dict: the header row holds
+    product names, the first column characteristic names.
+    """
+    for table in tables:
+        if not table:
+            continue
+        headers = table[0]
+        for col in range(len(headers)):
+            product_name = headers[col]
+            if product_name and product_name.strip():
+                if product_name not in products:
+                    products[product_name] = {}
+                for row in table[1:]:
+                    if len(row) > col:
+                        characteristic = row[0]
+                        value = row[col]
+                        if characteristic and value:
+                            products[product_name][characteristic.strip()] = value.strip()
+    return products
@@ -0,0 +1,103 @@
+"""
+Lightweight scraper for public product pages.
+
+The three fields the SEO generator reads (``h1#description``, ``div#sku``
+and ``h2#descl``) are server-rendered, so they are read from the raw HTML:
+pages are fetched over a pooled keep-alive ``requests`` session and parsed
+with precompiled lxml XPath expressions. ``scrape`` returns None when a
+field is missing or the page cannot be fetched or parsed, and the caller
+then falls back to the browser.
+"""
+import asyncio
+import threading
+
+import requests
+from lxml import etree, html as lxml_html
+from requests.adapters import HTTPAdapter
+
+DESCRIPTION_XPATH = etree.XPath('//h1[@id="description"]')
+SKU_XPATH = etree.XPath('//div[@id="sku"]')
+DESCL_XPATH = etree.XPath('//h2[@id="descl"]')
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)"}
+
+
+def format_product_info(description, sku_ref, descl_html):
+    """
+    Build the product information block of the prompt from the page fields.
+
+    :return: (product info, SKU reference)
+    """
+    sku_ref = sku_ref.replace('Ref :', '').strip()
+    descl_lines = [line.strip() for line in descl_html.split('<br>')]
+
+    combined_info = f"Description: {description}\n"
+    combined_info += f"SKU Reference: {sku_ref}\n"
+    combined_info += "Detailed Specifications:\n"
+    for line in descl_lines:
+        combined_info += f"{line}\n"
+    return combined_info, sku_ref
+
+
+def _inner_html(element):
+    # Same serialisation as the browser's innerHTML for these simple blocks.
+    return (element.text or "") + "".join(
+        etree.tostring(child, method="html", encoding="unicode") for child in element
+    )
+
+
+def parse_product_page(text):
+    """
+    Return (product info, SKU reference) from a product page, or None when a field is missing
+    or the page cannot be parsed.
+    """
+    try:
+        tree = lxml_html.fromstring(text)
+    except (ValueError, etree.LxmlError):
+        # e.g. a str page starting with an XML encoding declaration, or an empty document
+        return None
+    description, sku, descl = DESCRIPTION_XPATH(tree), SKU_XPATH(tree), DESCL_XPATH(tree)
+    if not (description and sku and descl):
+        return None
+    return format_product_info(description[0].text_content(), sku[0].text_content(), _inner_html(descl[0]))
+
+
+class HttpProductScraper:
+    def __init__(self, pool_size=8, timeout=15):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pages = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, url):
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException:
+            result = None
+        else:
+            if "charset" not in response.headers.get("Content-Type", "").lower():
+                response.encoding = response.apparent_encoding
+            result = parse_product_page(response.text) if response.ok and response.text.strip() else None
+        with self._lock:
+            if result is None:
+                self.fallbacks += 1
+            else:
+                self.pages += 1
+        return result
+
+    async def scrape(self, url):
+        """
+        Async wrapper running the blocking fetch in a worker thread.
+        """
+        return await asyncio.to_thread(self.fetch, url)
+
+    def summary(self):
+        return f"HTTP scraper: {self.pages} pages parsed, {self.fallbacks} browser fallbacks"
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,106 @@
+"""
+Content-addressed disk cache of generated SEO descriptions.
+
+A description is stored under the SHA-256 of everything that decides the
+model's output: the prompt template, the model name, the temperature and the
+scraped product information. Reruns, variants with identical pages and
+retries after a crash reuse the stored text instead of calling the model.
+A file's mtime is when the description was generated and its atime when it
+was last used: entries generated more than ``max_age`` ago are ignored however
+often they are hit, and ``evict`` trims the cache to ``max_bytes`` by dropping
+the least recently used files first.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path.home() / ".restoconcept" / "seo_cache"
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_MAX_AGE = 90 * 24 * 3600
+
+
+def cache_key(template, model, temperature, product_info):
+    payload = json.dumps([template, model, temperature, product_info], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DescriptionCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        """
+        :param directory: Defaults to $RESTOCONCEPT_SEO_CACHE or ~/.restoconcept/seo_cache
+        :param max_bytes: Size the cache is trimmed to by evict()
+        :param max_age: Seconds after its generation when an entry is treated as missing
+        """
+        self.directory = Path(directory or os.environ.get("RESTOCONCEPT_SEO_CACHE") or DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.txt"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            created = path.stat().st_mtime
+            if self.max_age is not None and time.time() - created > self.max_age:
+                raise FileNotFoundError(path)
+            text = path.read_text(encoding="utf-8")
+            # Refresh the access time used by evict(), keeping the generation time
+            os.utime(path, (time.time(), created))
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key, text):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """
+        Delete expired entries, then the least recently used ones until the
+        cache fits in max_bytes. Returns the number of files removed.
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in self.directory.glob("*/*.txt"):
+            try:
+                stat = path.stat()
+                if self.max_age is not None and now - stat.st_mtime > self.max_age:
+                    path.unlink()
+                    removed += 1
+                    continue
+            except OSError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = f" ({self.hits / lookups:.0%} hit rate)" if lookups else ""
+        return f"Description cache: {self.hits} hits, {self.misses} misses{rate}"
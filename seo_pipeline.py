@@ -0,0 +1,177 @@
+"""
+Building blocks of the SEO description generator's pipeline.
+
+``PagePool`` keeps one Chromium, one context and a fixed set of pages alive
+for a whole batch instead of launching a browser per product; the browser is
+only started when the first page is borrowed. ``run_pipeline``
+runs two stages, scrape then generate, each with its own concurrency, joined
+by a bounded queue: scraping product N+1 overlaps generation for product N,
+and the queue bound stops scraping from running far ahead of the model.
+"""
+import asyncio
+import re
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from context_factory import async_new_context
+
+DEFAULT_SCRAPE_CONCURRENCY = 4
+DEFAULT_GENERATE_CONCURRENCY = 4
+
+
+class PagePool:
+    def __init__(self, size=DEFAULT_SCRAPE_CONCURRENCY, profile="scrape", stats=None, base_url=None, headless=True):
+        """
+        :param size: Number of pages, i.e. pages loading at the same time
+        :param profile: context_factory resource profile of the context
+        :param stats: BlockingStats to add the context's blocked requests to
+        """
+        self.size = max(1, size)
+        self.profile = profile
+        self.stats = stats
+        self.base_url = base_url
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._idle = None
+        self._start_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._close()
+
+    @property
+    def started(self):
+        return self._idle is not None
+
+    async def _start(self):
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            self._playwright = await async_playwright().start()
+            try:
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                self._context, self.stats = await async_new_context(
+                    self._browser, self.profile, self.stats, base_url=self.base_url
+                )
+                idle = asyncio.Queue()
+                for _ in range(self.size):
+                    idle.put_nowait(await self._context.new_page())
+            except Exception:
+                await self._close()
+                raise
+            self._idle = idle
+
+    async def _close(self):
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Borrow a page for the duration of the block; a page that crashed or
+        was closed is replaced before it goes back to the pool.
+        """
+        if self._idle is None:
+            await self._start()
+        page = await self._idle.get()
+        try:
+            yield page
+        finally:
+            if page.is_closed():
+                page = await self._context.new_page()
+            self._idle.put_nowait(page)
+
+
+class StubLLM:
+    """
+    Offline stand-in for the ``model | parser`` chain: returns a
+    deterministic description built from the product information of the
+    prompt after an optional delay, so the cache and the pipeline can be run
+    without network access or API quota.
+    """
+
+    name = "stub"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        info = prompt.rsplit("Product Information:", 1)[-1].strip()
+        title = re.search(r"^Description: (.*)$", info, re.MULTILINE)
+        lines = [line for line in info.splitlines() if line.strip()]
+        return (
+            f'<br><h2 style="text-align: center;">{title.group(1) if title else "Produit"}</h2><br>\n'
+            "<h3>Caractéristiques techniques</h3>\n" + "\n".join(f"- {line}" for line in lines)
+        )
+
+
+async def run_pipeline(items, scrape, generate, scrape_concurrency=DEFAULT_SCRAPE_CONCURRENCY,
+                       generate_concurrency=DEFAULT_GENERATE_CONCURRENCY, queue_size=None, on_progress=None):
+    """
+    Scrape and generate every item through two concurrent stages.
+
+    :param scrape: async scrape(item) -> scraped data
+    :param generate: async generate(item, scraped) -> result
+    :param queue_size: Scraped items waiting for the generate stage, 2 x generate_concurrency by default
+    :param on_progress: Called with (finished count, total, item, error or None) after each item
+    :return: (item, result, error) for every item, in input order
+    """
+    items = list(items)
+    results = [None] * len(items)
+    pending = asyncio.Queue()
+    for position, item in enumerate(items):
+        pending.put_nowait((position, item))
+    scraped_queue = asyncio.Queue(maxsize=queue_size or 2 * generate_concurrency)
+    finished = 0
+
+    def finish(position, result, error):
+        nonlocal finished
+        results[position] = (items[position], result, error)
+        finished += 1
+        if on_progress is not None:
+            on_progress(finished, len(items), items[position], error)
+
+    async def scraper():
+        while not pending.empty():
+            position, item = pending.get_nowait()
+            try:
+                scraped = await scrape(item)
+            except Exception as e:
+                finish(position, None, e)
+                continue
+            await scraped_queue.put((position, scraped))
+
+    async def generator():
+        while True:
+            entry = await scraped_queue.get()
+            if entry is None:
+                return
+            position, scraped = entry
+            try:
+                finish(position, await generate(items[position], scraped), None)
+            except Exception as e:
+                finish(position, None, e)
+
+    generators = [asyncio.create_task(generator()) for _ in range(max(1, generate_concurrency))]
+    try:
+        await asyncio.gather(*(scraper() for _ in range(max(1, scrape_concurrency))))
+        for _ in generators:
+            await scraped_queue.put(None)
+        await asyncio.gather(*generators)
+    finally:
+        for task in generators:
+            task.cancel()
+    return results
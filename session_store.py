@@ -0,0 +1,83 @@
+"""
+Persistent Playwright sessions shared by every Restoconcept tool.
+
+A successful login saves the context's ``storage_state`` (cookies and local
+storage) to disk, keyed by account. The next run opens its context from that
+file and only logs in again when ``session_is_valid`` sees that the admin
+session has expired.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+
+DEFAULT_SESSION_DIR = Path.home() / ".restoconcept" / "sessions"
+CHECK_PATH = "/admin/options/optionsgroupslist.asp"
+EXPIRED_MARKERS = ("adminPass", "Session expirée")
+
+
+class SessionStore:
+    def __init__(self, directory=None):
+        self.directory = Path(directory or os.environ.get("RESTOCONCEPT_SESSION_DIR") or DEFAULT_SESSION_DIR)
+
+    def path_for(self, username, base_url):
+        account = f"{username}@{urlparse(base_url).netloc}"
+        digest = hashlib.sha1(account.encode("utf-8")).hexdigest()[:16]
+        return self.directory / f"{digest}.json"
+
+    def load(self, username, base_url):
+        """
+        Return the saved storage state for this account, or None.
+        """
+        path = self.path_for(username, base_url)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, username, base_url, storage_state):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(username, base_url)
+        # Several workers may log in again at once: one temp file per process and thread
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        # The file holds live session cookies: keep it private to the user.
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(storage_state, f)
+        os.replace(tmp_path, path)
+
+    def clear(self, username, base_url):
+        try:
+            self.path_for(username, base_url).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _is_logged_in(url, status, body):
+    return status == 200 and "logon.asp" not in url and not any(marker in body for marker in EXPIRED_MARKERS)
+
+
+def session_is_valid(context, base_url):
+    """
+    Cheap check of the context's admin session: one plain HTTP request that
+    shares the context's cookies, without rendering a page.
+    """
+    try:
+        response = context.request.get(f"{base_url}{CHECK_PATH}", timeout=10000)
+        return _is_logged_in(response.url, response.status, response.text())
+    except Exception:
+        return False
+
+
+async def async_session_is_valid(context, base_url):
+    """
+    Async counterpart of ``session_is_valid`` for ``async_playwright`` contexts.
+    """
+    try:
+        response = await context.request.get(f"{base_url}{CHECK_PATH}", timeout=10000)
+        return _is_logged_in(response.url, response.status, await response.text())
+    except Exception:
+        return False
@@ -0,0 +1,133 @@
+"""
+Streaming writers for the tables extracted from PDF catalogues.
+
+Tables are written as soon as their page is extracted, so memory stays flat
+however many rows a catalogue has:
+
+- Excel through xlsxwriter's ``constant_memory`` mode, which flushes every
+  row to disk once the next one starts, with the same layout as before: each
+  table with its header row, one blank row between tables.
+- CSV and Parquet in long format, one line per cell (page, table, row,
+  column, header, value), for loading into other tools. Parquet rows are
+  buffered and written as row groups of ``batch_rows`` cells.
+"""
+import csv
+
+import xlsxwriter
+
+SHEET_NAME = "Extracted Data"
+LONG_COLUMNS = ("page", "table", "row", "column", "header", "value")
+FORMATS = {"xlsx": "Excel (.xlsx)", "csv": "CSV (.csv)", "parquet": "Parquet (.parquet)"}
+
+
+def _cells(page_num, table_index, table):
+    headers = table[0] if table else []
+    for row_index, row in enumerate(table[1:], 1):
+        for col, value in enumerate(row):
+            header = headers[col] if col < len(headers) else None
+            yield page_num + 1, table_index, row_index, col, header, value
+
+
+class TableWriter:
+    """
+    Base of the writers: write_table() for each table in page order, then close().
+    """
+
+    def write_table(self, page_num, table_index, table):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ExcelTableWriter(TableWriter):
+    def __init__(self, path):
+        self.path = path
+        self.workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        self.sheet = self.workbook.add_worksheet(SHEET_NAME)
+        self.header_format = self.workbook.add_format({"bold": True, "border": 1, "align": "center"})
+        self.row_position = 0  # Next free row of the sheet
+        self.tables = 0
+
+    def write_table(self, page_num, table_index, table):
+        if not table:
+            return
+        self.sheet.write_row(self.row_position, 0, table[0], self.header_format)
+        for offset, row in enumerate(table[1:], 1):
+            self.sheet.write_row(self.row_position + offset, 0, row)
+        self.row_position += len(table) + 1  # Add space between tables
+        self.tables += 1
+
+    def close(self):
+        self.workbook.close()
+
+
+class CsvTableWriter(TableWriter):
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(LONG_COLUMNS)
+        self.tables = 0
+
+    def write_table(self, page_num, table_index, table):
+        self.writer.writerows(_cells(page_num, table_index, table))
+        self.tables += 1
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetTableWriter(TableWriter):
+    def __init__(self, path, batch_rows=50_000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.path = path
+        self.batch_rows = batch_rows
+        self.schema = pa.schema([
+            ("page", pa.int32()), ("table", pa.int32()), ("row", pa.int32()), ("column", pa.int32()),
+            ("header", pa.string()), ("value", pa.string()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.buffer = []
+        self.tables = 0
+
+    def write_table(self, page_num, table_index, table):
+        self.buffer.extend(_cells(page_num, table_index, table))
+        self.tables += 1
+        if len(self.buffer) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+
+        if self.buffer:
+            columns = list(zip(*self.buffer))
+            self.writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, self.schema)], schema=self.schema
+            ))
+            self.buffer = []
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+WRITERS = {"xlsx": ExcelTableWriter, "csv": CsvTableWriter, "parquet": ParquetTableWriter}
+
+
+def open_table_writer(path, fmt=None):
+    """
+    Return the writer for `fmt` ("xlsx", "csv" or "parquet"), taken from the file extension by default.
+    """
+    fmt = fmt or path.rsplit(".", 1)[-1].lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported output format: {fmt}")
+    return WRITERS[fmt](path)
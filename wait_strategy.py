@@ -0,0 +1,116 @@
+"""
+Wait strategies for the sync Playwright workers.
+
+Each step of a worker (search, navigation, update) clicks something and then
+has to wait until the page is usable again. ``NetworkIdleWaits`` is the old
+behaviour: ``networkidle`` after every click plus a fixed pause per item.
+``EventWaits`` waits for the exact event the step produces, with per-step
+timeouts: the new document of a navigation or an update, and the response of
+a search. A search answered by a new document waits until that document has
+replaced the old one; an AJAX search waits until the page is quiet again.
+"""
+import time
+from contextlib import contextmanager
+
+# Set on the document shown before a search, gone once a new document replaced it
+OLD_DOCUMENT_FLAG = "__waitsOldDocument"
+
+DEFAULT_TIMEOUTS = {
+    "search": 15000,
+    "navigation": 15000,
+    "update": 15000,
+}
+
+
+class NetworkIdleWaits:
+    name = "networkidle"
+
+    def __init__(self, timeouts=None, settle=1.0):
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.settle = settle
+
+    def _click_and_idle(self, page, click, step):
+        click()
+        page.wait_for_load_state("networkidle", timeout=self.timeouts[step])
+
+    def search(self, page, click):
+        self._click_and_idle(page, click, "search")
+
+    def navigate(self, page, click):
+        self._click_and_idle(page, click, "navigation")
+
+    def update(self, page, click):
+        self._click_and_idle(page, click, "update")
+
+    def pause(self):
+        if self.settle:
+            time.sleep(self.settle)
+
+
+class EventWaits(NetworkIdleWaits):
+    name = "event"
+
+    def __init__(self, timeouts=None):
+        super().__init__(timeouts, settle=0)
+
+    def _click_and_navigate(self, page, click, step):
+        with page.expect_navigation(wait_until="domcontentloaded", timeout=self.timeouts[step]):
+            click()
+
+    def search(self, page, click):
+        timeout = self.timeouts["search"]
+        page.evaluate(f"() => {{ window.{OLD_DOCUMENT_FLAG} = true; }}")
+        with page.expect_response(
+            lambda response: response.request.resource_type in ("document", "xhr", "fetch"), timeout=timeout
+        ) as response_info:
+            click()
+        if response_info.value.request.is_navigation_request():
+            # The results arrived but the old document may still be shown: wait for the new one
+            page.wait_for_function(f"() => !window.{OLD_DOCUMENT_FLAG}", timeout=timeout)
+            page.wait_for_load_state("domcontentloaded", timeout=timeout)
+        else:
+            # AJAX search: the results are in once the page is quiet again
+            page.wait_for_load_state("networkidle", timeout=timeout)
+
+    def navigate(self, page, click):
+        self._click_and_navigate(page, click, "navigation")
+
+    def update(self, page, click):
+        # The form reloads the page: the next step must not run on the old document
+        self._click_and_navigate(page, click, "update")
+
+
+WAIT_STRATEGIES = {
+    NetworkIdleWaits.name: NetworkIdleWaits,
+    EventWaits.name: EventWaits,
+}
+
+
+class StepTimer:
+    """
+    Collect wall-clock durations per named step and format a report.
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations.setdefault(name, []).append(time.perf_counter() - start)
+
+    def report(self):
+        lines = [f"Timing report ({time.perf_counter() - self.started:.1f} s total):"]
+        for name, values in self.durations.items():
+            ordered = sorted(values)
+            p50 = ordered[len(ordered) // 2]
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(
+                f"  {name}: {len(values)} x, {sum(values):.1f} s total, "
+                f"p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms"
+            )
+        return lines